@@ -1,54 +1,52 @@
 import streamlit as st
-import tempfile
 import os
 import json
-import re
 import time
 from datetime import datetime
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor
-from resume_parser import parse_resume, parse_linkedin_json
-from roadmap_generator import generate_roadmap
+from resume_parser import parse_resume_cached, parse_linkedin_json
+from roadmap_generator import run_roadmap_job
 from goal_analyzer import analyze_goals
-import google.generativeai as genai
+import llm_gateway
+from llm_gateway import QA_MODEL
+import pandas as pd
 import plotly.express as px
-from datetime import timedelta
 from smart_gap_analyzer import get_smart_gap_analysis, SmartGapAnalysisError
-import hashlib
-
-ROADMAPS_DB_PATH = os.path.join(os.path.dirname(__file__), "roadmaps_db.json")
-
-
-def load_roadmaps_db():
-    if os.path.exists(ROADMAPS_DB_PATH):
-        with open(ROADMAPS_DB_PATH, "r") as f:
-            try:
-                return json.load(f)
-            except Exception:
-                return []
-    return []
-
-def save_roadmaps_db(roadmaps):
-    with open(ROADMAPS_DB_PATH, "w") as f:
-        json.dump(roadmaps, f, indent=2)
-
-def roadmap_id(resume, goal, role):
-    base = (resume.strip() + goal.strip() + role.strip()).encode("utf-8")
-    return hashlib.sha256(base).hexdigest()[:16]
+from functools import partial
+from roadmap_store import RoadmapStore, roadmap_id
+from skill_matcher import get_skill_matcher, load_skills_data, taxonomy_version
+from role_fit import RoleFitMatrix
+from lexical_fit import lexical_fit, passes_prescreen, LEXICAL_FIT_THRESHOLD
+from job_runner import get_job_runner, SUCCEEDED, CANCELLED
+from job_fit import (analyze_fit_and_roadmap, batch_job_fit, focused_roadmap_goal, load_job_descriptions, rank_fit_results,
+                     FIT_ANALYSIS, JobFitError)
+from roadmap_parser import parse_roadmap, RoadmapTask, DEFAULT_MODULE_DURATION, PHASE, MODULE, TASK, BULLET
+
+@st.cache_resource
+def get_roadmap_store():
+    """Shared SQLite roadmap store; migrates roadmaps_db.json on first use."""
+    return RoadmapStore()
 
 # Load skills data from JSON
 @st.cache_data
-def load_skills_data():
+def get_skills_data():
+    """The bundled skills taxonomy, read once through skill_matcher's loader."""
     try:
-        with open("skills_data.json", "r") as f:
-            return json.load(f)
+        return load_skills_data()
     except FileNotFoundError:
         st.error("Error: skills_data.json not found. Please ensure it's in the same directory as app.py")
         return {}
 
-skills_data = load_skills_data()
+skills_data = get_skills_data()
+
+@st.cache_resource
+def get_role_fit_matrix(version, _skills_data):
+    """Skill x role matrix used to suggest roles, built once per taxonomy version."""
+    matcher = get_skill_matcher()  # Process-wide matcher shared with the job fit and lexical modules
+    return RoleFitMatrix(_skills_data, matcher if matcher.version == version else None)
 
 def update_progress(progress_bar, eta_placeholder, current_progress, total_stages, start_time, estimated_time, stage_name):
     """Update progress bar with current stage information."""
@@ -59,55 +57,144 @@ def update_progress(progress_bar, eta_placeholder, current_progress, total_stage
     eta_placeholder.text(f"⏳ {stage_name}... {int(progress)}%")
 
 # Robust progress loading and saving
-import re
-
 def extract_roadmap_tasks(roadmap_text):
-    # Extract checklist tasks from the roadmap text (lines starting with - [ ])
-    tasks = []
-    for line in roadmap_text.splitlines():
-        match = re.match(r"\s*- \[.\] (.+)", line)
-        if match:
-            tasks.append(match.group(1).strip())
-    return tasks
+    # Stable IDs of the checklist tasks, from the shared (memoized) roadmap parse
+    return [task.id for task in parse_roadmap(roadmap_text).tasks]
+
+def roadmap_job_active():
+    """True while this session's roadmap generation job is queued or running."""
+    job_id = st.session_state.get("roadmap_job_id")
+    job = get_job_runner().get(job_id) if job_id else None
+    return job is not None and not job.done
 
 def get_active_roadmap():
-    for r in st.session_state.roadmaps_db:
-        if r.get("active"):
-            return r
-    return None
+    return get_roadmap_store().get_active_roadmap()
 
 def sync_progress_from_active_roadmap():
     active = get_active_roadmap()
     if active is not None:
-        # Ensure progress field exists and matches current roadmap tasks
-        roadmap_tasks = extract_roadmap_tasks(active["roadmap"])
-        if "progress" not in active or not isinstance(active["progress"], dict):
-            active["progress"] = {task: False for task in roadmap_tasks}
-        else:
-            # Add missing tasks
-            for task in roadmap_tasks:
-                if task not in active["progress"]:
-                    active["progress"][task] = False
-            # Remove tasks not in roadmap
-            for task in list(active["progress"].keys()):
-                if task not in roadmap_tasks:
-                    del active["progress"][task]
-        st.session_state.progress = dict(active["progress"])
+        # Match stored progress to the current roadmap tasks, keyed by task ID.
+        # Progress saved before task IDs existed is picked up by its old key.
+        roadmap_tasks = parse_roadmap(active["roadmap"]).tasks
+        stored = get_roadmap_store().get_progress(active["id"])
+        progress = {task.id: stored.get(task.id, stored.get(task.legacy_key, False)) for task in roadmap_tasks}
     else:
-        st.session_state.progress = {}
+        progress = {}
+    if progress != st.session_state.progress:
+        st.session_state.progress = progress
+        bump_progress_version()
+
+def bump_progress_version():
+    # Lets views cached on progress (e.g. the timeline colors) know it changed
+    st.session_state.progress_version = st.session_state.get("progress_version", 0) + 1
 
 def save_progress_to_active_roadmap():
     active = get_active_roadmap()
     if active is not None:
-        active["progress"] = dict(st.session_state.progress)
-        save_roadmaps_db(st.session_state.roadmaps_db)
+        # Only rows whose value changed are written
+        get_roadmap_store().replace_progress(active["id"], st.session_state.progress)
+    bump_progress_version()
+
+def save_task_progress(task_key):
+    """Persist a single toggled task; rapid toggles are coalesced by the store."""
+    active = get_active_roadmap()
+    if active is not None:
+        get_roadmap_store().set_task_progress(active["id"], task_key, st.session_state.progress[task_key])
+    bump_progress_version()
+
+def on_task_checkbox_change(task_id):
+    st.session_state.progress[task_id] = st.session_state[f"check_{task_id}"]
+    save_task_progress(task_id)
+
+def toggle_task_progress(task_id):
+    st.session_state.progress[task_id] = not st.session_state.progress.get(task_id, False)
+    st.session_state.pop(f"check_{task_id}", None) # Checklist box re-reads progress
+    save_task_progress(task_id)
+
+GANTT_COLORS = {"Completed": "#10b981", "Pending": "#f59e0b", "Overdue": "#ef4444"}
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_gantt_schedule(roadmap_digest, start_date, _roadmap_text):
+    """Timeline rows for a roadmap, computed once per roadmap hash and start date."""
+    rows = []
+    current_date = start_date
+
+    def add_row(task_id, task_name, duration, resource, task_type):
+        rows.append(dict(TaskId=task_id, Task=task_name, Start=current_date, Finish=current_date + duration,
+                         Resource=resource, Type=task_type))
+
+    for phase in parse_roadmap(_roadmap_text).phases:
+        if phase.title is not None and phase.name:
+            # Phases get their own row but don't advance the date
+            add_row(f"phase_{phase.name}", phase.name, phase.duration, "Project Phases", "Phase")
+        for section in phase.sections:
+            if section.is_module and section.title:
+                add_row(f"{phase.name}_{section.title}", section.title, DEFAULT_MODULE_DURATION, phase.name, "Module")
+                current_date += DEFAULT_MODULE_DURATION
+            for task in section.tasks:
+                if task.name:
+                    # Keyed by the same task ID as the checklist checkbox
+                    add_row(task.id, task.name, task.duration, phase.name, "Task")
+                    current_date += task.duration
+    df = pd.DataFrame(rows, columns=["TaskId", "Task", "Start", "Finish", "Resource", "Type"])
+    df["Start"] = pd.to_datetime(df["Start"])
+    df["Finish"] = pd.to_datetime(df["Finish"])
+    return df
+
+def get_gantt_figure(df_gantt, roadmap_digest, start_date):
+    """
+    Return the timeline figure for the current roadmap and progress.
+
+    The figure is built once per roadmap and start date and kept in the
+    session; when the progress version changes only its bar colors are
+    updated.
+    """
+    cache = st.session_state.setdefault("gantt_figure_cache", {})
+    figure_key = (roadmap_digest, start_date)
+    if cache.get("key") != figure_key:
+        fig = px.timeline(
+            df_gantt,
+            x_start="Start",
+            x_end="Finish",
+            y="Task",
+            title="Project Timeline",
+            hover_name="Task",
+            category_orders={"Task": df_gantt.sort_values(by="Start")["Task"].tolist()} # Preserve order
+        )
+        # Legend entries; the bars themselves are colored per task below
+        for status in ("Completed", "Pending"):
+            fig.add_bar(x=[None], y=[None], name=status, marker_color=GANTT_COLORS[status], showlegend=True)
+        fig.update_yaxes(autorange="reversed") # To display tasks from top to bottom
+        fig.update_layout(
+            title_font_size=20,
+            font_size=12,
+            plot_bgcolor='rgba(15, 23, 42, 0.4)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font_color="#f8fafc",
+            legend_title_text='Task Status',
+            font_family="Inter"
+        )
+        cache.update(key=figure_key, figure=fig, progress_version=None)
+    progress_version = st.session_state.get("progress_version", 0)
+    if cache["progress_version"] != progress_version:
+        progress = st.session_state.progress
+        cache["figure"].data[0].marker.color = [
+            GANTT_COLORS["Completed"] if progress.get(task_id, False) else GANTT_COLORS["Pending"]
+            for task_id in df_gantt["TaskId"]
+        ]
+        cache["progress_version"] = progress_version
+    return cache["figure"]
 
 # Configure Streamlit page
 st.set_page_config(page_title="SkillWise", page_icon="💡", layout="wide", initial_sidebar_state="expanded")
 
-# Load external CSS
-with open('style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+# Load external CSS (read once per server process)
+@st.cache_resource
+def load_css():
+    with open('style.css') as f:
+        return f.read()
+
+st.markdown(f'<style>{load_css()}</style>', unsafe_allow_html=True)
 
 # Additional custom styles
 st.markdown('<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">', unsafe_allow_html=True)
@@ -120,6 +207,8 @@ if "resume_text" not in st.session_state:
     st.session_state.resume_text = ""
 if "parsed_resume" not in st.session_state:
     st.session_state.parsed_resume = None
+if "resume_parse_metadata" not in st.session_state:
+    st.session_state.resume_parse_metadata = None
 if "goal" not in st.session_state:
     st.session_state.goal = ""
 if "role" not in st.session_state:
@@ -131,8 +220,6 @@ if "gemini_api_key" not in st.session_state:
 if "progress" not in st.session_state:
     st.session_state.progress = {}
 
-if "generation_time" not in st.session_state:
-    st.session_state.generation_time = 10.0
 if "first_visit" not in st.session_state:
     st.session_state.first_visit = True
 if "survey_submitted" not in st.session_state:
@@ -143,6 +230,8 @@ if "resume_upload_time" not in st.session_state:
     st.session_state.resume_upload_time = 5.0
 if "is_processing" not in st.session_state:
     st.session_state.is_processing = False
+if "roadmap_job_id" not in st.session_state:
+    st.session_state.roadmap_job_id = None
 
 # Onboarding Walkthrough for first-time users
 if st.session_state.first_visit:
@@ -166,7 +255,6 @@ with st.sidebar:
         if st.button("Submit"):
             if api_key_input:
                 st.session_state.gemini_api_key = api_key_input
-                genai.configure(api_key=api_key_input)
                 st.success("✅ API Key submitted!")
             else:
                 st.error("❌ Please enter a valid API key.")
@@ -195,7 +283,7 @@ with tab1:
         st.subheader("🎯 Select Career Goal")
         st.session_state.goal = st.text_input("What role are you targeting?", placeholder="e.g., AI Developer, Product Manager", value=st.session_state.goal)
         if st.session_state.goal.strip():
-            goal_analysis = analyze_goals(st.session_state.goal)
+            goal_analysis = analyze_goals(st.session_state.goal, api_key=st.session_state.gemini_api_key)
             # Check for the specific NLTK error message
             if "Error analyzing goal" in goal_analysis:
                 st.warning("⚠️ There was an issue analyzing your goal. Please ensure NLTK data is correctly set up or try a different goal.")
@@ -224,6 +312,12 @@ with tab1:
             "Other"
         ]
         st.session_state.role = st.selectbox("Choose a role", roles, index=roles.index(st.session_state.role) if st.session_state.role in roles else 0)
+        if st.session_state.resume_text and isinstance(skills_data, dict) and skills_data:
+            # Scored locally against every role at once; no API call
+            suggested_roles = get_role_fit_matrix(taxonomy_version(skills_data), skills_data).rank_roles(st.session_state.resume_text, top=3)
+            suggested_roles = [f"{role} ({score:.0f}%)" for role, score in suggested_roles if score > 0]
+            if suggested_roles:
+                st.caption(f"💡 Best fit for your resume: {', '.join(suggested_roles)}")
         if st.session_state.role == "Other":
             st.session_state.custom_role = st.text_input("Please specify your role", placeholder="e.g., Game Developer", value=st.session_state.custom_role)
     
@@ -237,19 +331,17 @@ with tab1:
         progress_bar = status_container.progress(0)
         eta_placeholder = status_container.empty()
         start_time = time.time()
-        tmp_path = None # Initialize tmp_path to ensure it's always defined for finally block
 
         try:
             file_type = uploaded_file.type
             update_progress(progress_bar, eta_placeholder, 0, 100, start_time, st.session_state.resume_upload_time, "Processing Resume")
 
             parsed_text = ""
+            st.session_state.resume_parse_metadata = None  # Only PDFs report per-page extraction
             if file_type == "application/pdf":
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                    tmp_file.write(uploaded_file.read())
-                    tmp_path = tmp_file.name
                 update_progress(progress_bar, eta_placeholder, 50, 100, start_time, st.session_state.resume_upload_time, "Parsing PDF")
-                parsed_text = parse_resume(tmp_path)
+                # Re-uploads of the same file are served from the parse cache
+                parsed_text, st.session_state.resume_parse_metadata = parse_resume_cached(uploaded_file.getvalue())
             elif file_type == "application/json":
                 update_progress(progress_bar, eta_placeholder, 50, 100, start_time, st.session_state.resume_upload_time, "Parsing JSON")
                 json_data = json.load(uploaded_file)
@@ -265,18 +357,25 @@ with tab1:
         except Exception as e:
             status_container.error(f"❌ Error processing resume: {str(e)}")
         finally:
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception as e:
-                    print(f"Error removing temp file: {e}") # Log error, don't crash
             status_container.empty()
             st.session_state.is_processing = False
             
             total_time = time.time() - start_time
             st.session_state.resume_upload_time = total_time
 
-    if st.button("🚀 Generate Roadmap") and not st.session_state.is_processing:
+    # Shown outside the status container, which is cleared once parsing finishes
+    parse_metadata = st.session_state.resume_parse_metadata
+    if parse_metadata and st.session_state.parsed_resume:
+        page_labels = {"text": "text layer", "ocr": "OCR", "ocr_failed": "OCR failed", "empty": "blank"}
+        st.caption("📑 Pages read: " + ", ".join(
+            f"{page_num} ({page_labels.get(source, source)})" for page_num, source in enumerate(parse_metadata["page_sources"], 1)
+        ))
+        failed_pages = parse_metadata.get("ocr_failed_pages")
+        if failed_pages:
+            st.warning(f"⚠️ Page(s) {', '.join(map(str, failed_pages))} of your resume could not be read (OCR failed) "
+                       "and are missing from the analysis. Try a text-based PDF or re-upload.")
+
+    if st.button("🚀 Generate Roadmap", disabled=roadmap_job_active()) and not st.session_state.is_processing:
         if not st.session_state.parsed_resume:
             st.warning("⚠️ Please upload a resume.")
         elif effective_role == "Select a tech role":
@@ -288,18 +387,11 @@ with tab1:
         else:
             # --- Persistent Roadmap Management Integration ---
             new_id = roadmap_id(st.session_state.resume_text, st.session_state.goal, effective_role)
-            found = None
-            for r in st.session_state.roadmaps_db:
-                if r["id"] == new_id:
-                    found = r
-                    break
+            store = get_roadmap_store()
+            found = store.get_roadmap(new_id)
             if found:
                 # Load existing
-                for rr in st.session_state.roadmaps_db:
-                    rr["active"] = (rr["id"] == found["id"])
-                    if rr["active"]:
-                        rr["last_accessed"] = datetime.now().isoformat()
-                save_roadmaps_db(st.session_state.roadmaps_db)
+                store.set_active(found["id"])
                 st.session_state.resume_text = found["resume"]
                 st.session_state.goal = found["goal"]
                 st.session_state.role = found["role"]
@@ -311,62 +403,51 @@ with tab1:
                 st.success("Loaded existing roadmap for this resume/goal/role. Check it in the Roadmap tab.")
                 st.rerun()
             else:
-                st.session_state.is_processing = True
-                processing_status_container = st.empty()
-                prompt = (
-                    f"Resume Text:\n{st.session_state.resume_text}\n\n"
-                    f"Target Role: {effective_role}\n"
-                    f"Career Goal: {st.session_state.goal}\n\n"
-                    "Generate a personalized 6-month learning roadmap. Focus on free or low-cost resources. "
-                    "Include specific course suggestions (if possible, from platforms like Coursera, edX, YouTube), "
-                    "project ideas to build a portfolio, and a general career plan or phases. "
-                    "The roadmap should be structured with clear phases, modules, and actionable tasks. "
-                    "Indicate estimated durations for tasks or modules (e.g., in weeks or days)."
+                new_roadmap = {
+                    "id": new_id,
+                    "resume": st.session_state.resume_text,
+                    "goal": st.session_state.goal,
+                    "role": effective_role,
+                }
+                # Generate in the background; the worker builds the prompt (condensing an
+                # oversized resume), then saves and activates the roadmap when done
+                st.session_state.roadmap_job_id = get_job_runner().submit(
+                    run_roadmap_job, new_roadmap, store, st.session_state.gemini_api_key, kind="roadmap"
                 )
-                with processing_status_container.container():
-                    progress_bar = st.progress(0)
-                    eta_placeholder = st.empty()
-                start_time = time.time()
-                error_occurred = False
-                try:
-                    genai.configure(api_key=st.session_state.gemini_api_key)
-                    estimated_duration = st.session_state.generation_time
-                    steps = 50
-                    for i in range(steps):
-                        progress_val = int((i / steps) * 90)
-                        update_progress(progress_bar, eta_placeholder, progress_val, 100, start_time, estimated_duration, "Generating Roadmap")
-                        time.sleep(estimated_duration / (steps * 10))
-                    st.session_state.roadmap = generate_roadmap(prompt)
-                    # Reset progress for new roadmap
-                    roadmap_tasks = extract_roadmap_tasks(st.session_state.roadmap)
-                    st.session_state.progress = {task: False for task in roadmap_tasks}
-                    save_progress_to_active_roadmap()
-                    update_progress(progress_bar, eta_placeholder, 100, 100, start_time, estimated_duration, "Complete")
-                    actual_time = time.time() - start_time
-                    st.session_state.generation_time = actual_time
-                    processing_status_container.success("✅ Roadmap generated! Check it in the Roadmap tab.")
-                    # Save new roadmap to DB
-                    new_roadmap = {
-                        "id": new_id,
-                        "resume": st.session_state.resume_text,
-                        "goal": st.session_state.goal,
-                        "role": effective_role,
-                        "roadmap": st.session_state.roadmap,
-                        "timestamp": datetime.now().isoformat(),
-                        "last_accessed": datetime.now().isoformat(),
-                        "active": True
-                    }
-                    for rr in st.session_state.roadmaps_db:
-                        rr["active"] = False
-                    st.session_state.roadmaps_db.insert(0, new_roadmap)
-                    save_roadmaps_db(st.session_state.roadmaps_db)
-                    st.success("New roadmap saved and set as active. Check it in the Roadmap tab.")
-                    st.rerun()
-                except Exception as e:
-                    error_occurred = True
-                    processing_status_container.error(f"❌ Error generating roadmap: {str(e)}")
-                finally:
-                    st.session_state.is_processing = False
+
+    # Poll the background job without rerunning the whole page
+    @st.fragment(run_every=1)
+    def roadmap_job_status():
+        job = get_job_runner().get(st.session_state.roadmap_job_id)
+        if job is None:
+            st.session_state.roadmap_job_id = None
+            st.rerun()
+        if job.status == SUCCEEDED:
+            st.session_state.roadmap_job_id = None
+            # Reset progress for the new roadmap (saved and set active by the job)
+            st.session_state.roadmap = job.result
+            roadmap_tasks = extract_roadmap_tasks(st.session_state.roadmap)
+            st.session_state.progress = {task: False for task in roadmap_tasks}
+            save_progress_to_active_roadmap()
+            st.toast("New roadmap saved and set as active. Check it in the Roadmap tab.")
+            st.rerun()
+        elif job.done:
+            if job.status == CANCELLED:
+                st.warning("Roadmap generation cancelled.")
+            else:
+                st.error(f"❌ Error generating roadmap: {job.error}")
+            if st.button("Dismiss", key="dismiss_roadmap_job"):
+                st.session_state.roadmap_job_id = None
+                st.rerun()
+        else:
+            st.info("✍️ Generating your roadmap... you can keep using the app meanwhile.")
+            st.button("Cancel", key="cancel_roadmap_job",
+                      on_click=get_job_runner().cancel, args=(job.id,))
+            with st.expander("Live preview", expanded=True):
+                st.markdown(job.partial_text or "_Waiting for the model..._")
+
+    if st.session_state.roadmap_job_id:
+        roadmap_job_status()
 
     st.markdown("---")
     # Job Role Simulator Expander
@@ -374,7 +455,9 @@ with tab1:
         st.subheader("Simulate Your Fit for a Specific Job")
         jd_text_input = st.text_area("Paste Job Description Text Here:", height=200, key="jd_text_input",
                                      help="Paste the full text of the job description you are interested in.")
-
+        jd_fit_threshold = st.slider("Minimum keyword overlap for AI analysis (%)", 0, 100, int(LEXICAL_FIT_THRESHOLD), key="jd_fit_threshold",
+                                     help="A quick local comparison runs first; below this overlap the AI calls are skipped.")
+        jd_force_llm = st.checkbox("Run the AI analysis even if keyword overlap is low", key="jd_force_llm")
 
         if st.button("🚀 Analyze Fit & Generate Focused Roadmap", key="analyze_jd_button"):
             if not st.session_state.parsed_resume:
@@ -386,84 +469,171 @@ with tab1:
             else:
                 job_description_content = jd_text_input.strip()
 
-
-                if job_description_content:
+                # Local pre-screen: obviously poor fits don't need the LLM
+                prescreen = lexical_fit(st.session_state.resume_text, job_description_content)
+                st.markdown(f"🔎 **Keyword overlap:** {prescreen.score:.0f}%")
+                if prescreen.overlapping:
+                    st.caption(f"Shared terms: {', '.join(prescreen.overlapping)}")
+                if prescreen.missing:
+                    st.caption(f"Missing terms: {', '.join(prescreen.missing)}")
+                prescreen_passed = jd_force_llm or passes_prescreen(prescreen, jd_fit_threshold)
+                if not prescreen_passed:
+                    st.warning(f"⚠️ Your resume shares little with this job ({prescreen.score:.0f}% < {jd_fit_threshold}%), "
+                               "so the AI analysis was skipped. Tick the box above to run it anyway.")
+
+                if job_description_content and prescreen_passed:
                     st.session_state.is_processing_jd = True # New state variable for JD processing
                     jd_status_container = st.empty()
 
                     with jd_status_container.container():
+                        # Both requests run at once; each result is rendered as soon as it arrives
                         st.subheader("🔍 Job Fit Analysis:")
-                        with st.spinner("Analyzing your resume against the job description..."):
-                            try:
-                                fit_analysis_prompt = (
-                                    f"My resume is:\n---\n{st.session_state.resume_text}\n---\n\n"
-                                    f"The job description is:\n---\n{job_description_content}\n---\n\n"
-                                    "Please provide a concise analysis of how well my resume matches this specific job description. "
-                                    "Highlight key strengths and specific gaps or missing qualifications relevant to this job. "
-                                    "Conclude with a percentage fit score (e.g., Fit Score: 75%)."
-                                )
-                                model = genai.GenerativeModel("gemini-2.0-flash") # Ensure model is configured
-                                response_fit = model.generate_content(fit_analysis_prompt)
-                                st.session_state.job_fit_analysis = response_fit.text.strip()
-                                st.markdown(st.session_state.job_fit_analysis)
-                            except Exception as e:
-                                st.error(f"Error during Job Fit Analysis: {e}")
-                                st.session_state.job_fit_analysis = None
-
-                        if st.session_state.job_fit_analysis:
-                            st.subheader("🗺️ Generating Focused Roadmap for this Job:")
-                            with st.spinner("Generating a new roadmap focused on this job's requirements..."):
-                                try:
-                                    focused_roadmap_prompt = (
-                                        f"My resume is:\n---\n{st.session_state.resume_text}\n---\n\n"
-                                        f"The target job description is:\n---\n{job_description_content}\n---\n\n"
-                                        f"My previous general career goal was '{st.session_state.goal}' for the role of '{effective_role}'.\n\n"
-                                        "Now, generate a highly focused 6-month learning roadmap to specifically address the gaps and requirements for THIS job description. "
-                                        "Prioritize skills and experiences mentioned in the job description. "
-                                        "Suggest concrete learning steps, resources (like specific types of courses or projects), and how they help bridge the gap for this particular job. "
-                                        "The output should be a structured roadmap."
-                                    )
-                                    # We can reuse the existing roadmap_generator.py function
-                                    focused_roadmap = generate_roadmap(focused_roadmap_prompt)
-                                    st.session_state.focused_jd_roadmap = focused_roadmap
-
-                                    # Option: Update main roadmap or show separately
-                                    # For now, let's update the main roadmap and notify the user
-                                    st.session_state.roadmap = focused_roadmap
-                                    st.success("✅ Focused roadmap generated and updated in the 'Roadmap' tab!")
-                                    # Also clear any previous smart gap analysis as the roadmap context has changed
-                                    if "smart_gap_analysis_result" in st.session_state:
-                                        del st.session_state.smart_gap_analysis_result
-                                    st.rerun() # Rerun to refresh the roadmap tab
-                                except Exception as e:
-                                    st.error(f"Error generating focused roadmap: {e}")
-                                    st.session_state.focused_jd_roadmap = None
+                        fit_placeholder = st.empty()
+                        fit_placeholder.info("Analyzing your resume against the job description...")
+                        st.subheader("🗺️ Focused Roadmap for this Job:")
+                        roadmap_placeholder = st.empty()
+                        roadmap_placeholder.info("Generating a new roadmap focused on this job's requirements...")
+
+                        for name, result, error in analyze_fit_and_roadmap(
+                            st.session_state.resume_text, job_description_content, st.session_state.goal, effective_role,
+                            api_key=st.session_state.gemini_api_key
+                        ):
+                            if name == FIT_ANALYSIS:
+                                st.session_state.job_fit_analysis = result
+                                if error:
+                                    fit_placeholder.error(f"Error during Job Fit Analysis: {error}")
+                                else:
+                                    fit_placeholder.markdown(result)
+                            elif error:
+                                roadmap_placeholder.error(f"Error generating focused roadmap: {error}")
+                                st.session_state.focused_jd_roadmap = None
+                            else:
+                                st.session_state.focused_jd_roadmap = result
+                                # Save it as the active roadmap so the Roadmap tab keeps showing it;
+                                # the stored goal names the job, and the id is derived from it
+                                jd_goal = focused_roadmap_goal(st.session_state.goal, job_description_content)
+                                get_roadmap_store().add_roadmap({
+                                    "id": roadmap_id(st.session_state.resume_text, jd_goal, effective_role),
+                                    "resume": st.session_state.resume_text,
+                                    "goal": jd_goal,
+                                    "role": effective_role,
+                                    "roadmap": result,
+                                    "timestamp": datetime.now().isoformat(),
+                                    "last_accessed": datetime.now().isoformat(),
+                                })
+                                st.session_state.roadmap = result
+                                roadmap_tasks = extract_roadmap_tasks(result)
+                                st.session_state.progress = {task: False for task in roadmap_tasks}
+                                save_progress_to_active_roadmap()
+                                # Also clear any previous smart gap analysis as the roadmap context has changed
+                                if "smart_gap_analysis_result" in st.session_state:
+                                    del st.session_state.smart_gap_analysis_result
+                                roadmap_placeholder.success("✅ Focused roadmap generated and updated in the 'Roadmap' tab!")
                     st.session_state.is_processing_jd = False
                 elif not jd_text_input.strip():
                      st.warning("Please paste the job description text.")
 
+    # Batch Job Comparison Expander
+    with st.expander("📊 Batch Job Comparison (Optional)", expanded=False):
+        st.subheader("Rank Your Fit Against Many Jobs")
+        batch_jd_text = st.text_area("Paste Job Descriptions (separate them with a line of ---):", height=200, key="batch_jd_text")
+        batch_jd_files = st.file_uploader("Or upload job descriptions (.txt/.md, or .jsonl with one posting per line)",
+                                          type=["txt", "md", "jsonl"], accept_multiple_files=True, key="batch_jd_files")
+        batch_fit_threshold = st.slider("Minimum keyword overlap for AI analysis (%)", 0, 100, int(LEXICAL_FIT_THRESHOLD), key="batch_fit_threshold",
+                                        help="Jobs below this local keyword overlap are ranked without calling the AI.")
+
+        if st.button("📊 Compare Against All Jobs", key="batch_jd_button"):
+            batch_jobs = load_job_descriptions("pasted.txt", batch_jd_text)
+            try:
+                for jd_file in batch_jd_files or []:
+                    batch_jobs.extend(load_job_descriptions(jd_file.name, jd_file.getvalue().decode("utf-8", errors="ignore")))
+            except JobFitError as e:
+                st.error(f"❌ {e}")
+                batch_jobs = []
+            if not st.session_state.parsed_resume:
+                st.warning("⚠️ Please upload your resume first before comparing job descriptions.")
+            elif not batch_jobs:
+                st.warning("⚠️ Please paste or upload at least one job description.")
+            elif not st.session_state.gemini_api_key:
+                st.error("❌ Please enter a Gemini API key in the sidebar.")
+            else:
+                # Duplicate descriptions are analyzed (and reported) once
+                unique_job_count = len({description for _, description in batch_jobs})
+                batch_progress = st.progress(0.0, text=f"Analyzing 0 of {unique_job_count} jobs...")
+                batch_results = []
+                for result in batch_job_fit(st.session_state.resume_text, batch_jobs, threshold=batch_fit_threshold,
+                                            api_key=st.session_state.gemini_api_key):
+                    batch_results.append(result)
+                    batch_progress.progress(len(batch_results) / unique_job_count,
+                                            text=f"Analyzed {len(batch_results)} of {unique_job_count} jobs...")
+                batch_progress.empty()
+                st.session_state.batch_fit_results = rank_fit_results(batch_results)
+
+        if st.session_state.get("batch_fit_results"):
+            ranked = st.session_state.batch_fit_results
+            st.dataframe(
+                pd.DataFrame({
+                    "Rank": range(1, len(ranked) + 1),
+                    "Job": [r["title"] for r in ranked],
+                    "Fit Score": [r["fit_score"] for r in ranked],
+                    "Keyword Overlap": [round(r["lexical_score"]) for r in ranked],
+                    "Status": ["Skipped (low overlap)" if r["skipped"] else "Error" if r["error"] else ("OK" if r["fit_score"] is not None else "No score") for r in ranked],
+                }),
+                hide_index=True,
+                column_config={"Fit Score": st.column_config.ProgressColumn("Fit Score", format="%d%%", min_value=0, max_value=100)},
+            )
+            selected_job = st.selectbox("View analysis for:", range(len(ranked)), key="batch_fit_selected",
+                                        format_func=lambda i: f"{i + 1}. {ranked[i]['title']}")
+            if ranked[selected_job]["skipped"]:
+                st.info(f"Skipped: only {ranked[selected_job]['lexical_score']:.0f}% keyword overlap. Lower the threshold to analyze it.")
+            elif ranked[selected_job]["error"]:
+                st.error(f"Error during Job Fit Analysis: {ranked[selected_job]['error']}")
+            else:
+                st.markdown(ranked[selected_job]["analysis"])
+
 
 # Roadmap Tab
 with tab2:
     if st.session_state.roadmap:
         st.header("🗺️ Your AI-Powered Learning Roadmap")
         
-        required_skills = {}
-        default_skills = []
-        expanded_skill_terms = {}
-        course_recommendations = {}
+        skill_matcher = None
         skills_to_check = [] # Initialize to an empty list
 
         if isinstance(skills_data, dict) and skills_data:
-            required_skills = skills_data.get("required_skills", {})
-            default_skills = skills_data.get("default_skills", [])
-            expanded_skill_terms = skills_data.get("expanded_skill_terms", {})
-            course_recommendations = skills_data.get("course_recommendations", {})
-
-            skills_to_check = required_skills.get(effective_role, default_skills)
+            skill_matcher = get_skill_matcher()
+            skills_to_check = skill_matcher.skills_for_role(effective_role)
         else:
             st.warning("⚠️ Skill data could not be loaded. Please check 'skills_data.json'.")
 
+        # Instant keyword-based check: one local pass over the resume, no API call
+        if skill_matcher and skills_to_check and st.session_state.resume_text:
+            skill_gap = skill_matcher.analyze(st.session_state.resume_text, skills_to_check)
+            st.subheader("📊 Keyword-Based Skill Match Score")
+            st.markdown(f"Your skills match {skill_gap.score:.1f}% of the keyword requirements for {effective_role}.")
+
+            st.subheader("🔍 Keyword-Based Skill Gap Analysis")
+            if skill_gap.missing:
+                st.markdown(f"Skills missing (keywords): {', '.join(skill_gap.missing)}")
+                st.subheader("📚 Recommended Courses for Skill Gaps (Keyword-Based)")
+                for skill in skill_gap.missing:
+                    course = skill_matcher.course_for(skill)
+                    if course:
+                        st.markdown(f"- **{skill}**: {course}")
+                    else:
+                        st.markdown(f"- **{skill}**: No specific course recommendation available. Try searching on Coursera or Udemy.")
+            else:
+                st.markdown("✅ Your resume covers all key skills for this role based on keywords!")
+            if skill_gap.matched:
+                with st.expander("Where these skills appear in your resume"):
+                    resume_text = st.session_state.resume_text
+                    for skill, matches in skill_gap.matched.items():
+                        first = matches[0]
+                        snippet = " ".join(resume_text[max(0, first.start - 40):first.end + 40].split())
+                        st.markdown(f"- **{skill}** — found as “{first.alias}” ({len(matches)}×)")
+                        st.caption(f"…{snippet}…")
+            st.markdown("---")
+
         # Smart AI Gap Detector
         st.subheader("🤖 Smart AI Gap Analysis")
         if st.session_state.resume_text and effective_role != "Select a tech role":
@@ -478,7 +648,8 @@ with tab2:
                             analysis_result = get_smart_gap_analysis(
                                 st.session_state.resume_text,
                                 effective_role,
-                                st.session_state.goal
+                                st.session_state.goal,
+                                api_key=st.session_state.gemini_api_key
                             )
                             st.session_state.smart_gap_analysis_result = analysis_result
                             st.session_state.smart_gap_analysis_role = effective_role # Cache the role for which analysis was run
@@ -504,373 +675,74 @@ with tab2:
 
         st.markdown("---")
 
-        # Old keyword-based analysis (can be kept for comparison or removed)
-        # For now, I'll comment it out to prioritize the new AI analysis.
-        # if skills_to_check:
-        #     resume_text_lower = st.session_state.resume_text.lower()
-        #     matched_conceptual_skills = []
-        #     for conceptual_skill in skills_to_check:
-        #         aliases = expanded_skill_terms.get(conceptual_skill, [conceptual_skill])
-        #         if any(alias.lower() in resume_text_lower for alias in aliases):
-        #             matched_conceptual_skills.append(conceptual_skill)
-        #
-        #     skill_match_score = (len(matched_conceptual_skills) / len(skills_to_check)) * 100 if skills_to_check else 0
-        #     st.subheader("📊 Keyword-Based Skill Match Score")
-        #     st.markdown(f"Your skills match {skill_match_score:.1f}% of the keyword requirements for {effective_role}.")
-        #
-        #     st.subheader("🔍 Keyword-Based Skill Gap Analysis")
-        #     missing_conceptual_skills = [skill for skill in skills_to_check if skill not in matched_conceptual_skills]
-        #
-        #     if missing_conceptual_skills:
-        #         st.markdown(f"Skills missing (keywords): {', '.join(missing_conceptual_skills)}")
-        #         st.subheader("📚 Recommended Courses for Skill Gaps (Keyword-Based)")
-        #         for skill in missing_conceptual_skills:
-        #             if skill in course_recommendations:
-        #                 st.markdown(f"- **{skill}**: {course_recommendations[skill]}")
-        #             else:
-        #                 st.markdown(f"- **{skill}**: No specific course recommendation available. Try searching on Coursera or Udemy.")
-        #     else:
-        #         st.markdown("✅ Your resume covers all key skills for this role based on keywords!")
-        # st.markdown("---")
-
-        # Visual Timeline (Gantt Chart)
-        st.subheader("🗓️ Visual Timeline (6 Months)")
-
-        def parse_duration(duration_str):
-            """Parses duration like '(1 week)', '(3 days)' into timedelta."""
-            if not duration_str:
-                return timedelta(weeks=1) # Default duration
-            match = re.search(r'\((\d+)\s*(week|day)s?\)', duration_str, re.IGNORECASE)
-            if match:
-                value = int(match.group(1))
-                unit = match.group(2).lower()
-                if unit == "week":
-                    return timedelta(weeks=value)
-                elif unit == "day":
-                    return timedelta(days=value)
-            return timedelta(weeks=1) # Default if parsing fails
-
-        roadmap_tasks_for_gantt = []
-        current_date = datetime.now()
-        overall_start_date = current_date
-
-        roadmap_lines = st.session_state.roadmap.splitlines()
-        current_phase_gantt = "General"
-        current_module_gantt = "General"
-
-        for line_idx, line_content in enumerate(roadmap_lines):
-            line_content = line_content.strip()
-            if not line_content:
-                continue
-
-            task_name = ""
-            task_type = "Task" # Phase, Module, Task
-            duration_text = ""
-
-            if line_content.startswith("##"): # Phase
-                task_name = line_content[2:].strip()
-                # Try to extract duration from phase title, e.g., "## Phase 1: Foundations (Weeks 1-4)"
-                duration_match = re.search(r'\(Weeks (\d+)-(\d+)\)', task_name, re.IGNORECASE)
-                if duration_match:
-                    start_week = int(duration_match.group(1))
-                    end_week = int(duration_match.group(2))
-                    duration = timedelta(weeks=(end_week - start_week + 1))
-                    task_name = re.sub(r'\s*\(Weeks \d+-\d+\)', '', task_name).strip() # Clean task name
-                else:
-                    duration = timedelta(weeks=4) # Default phase duration
-                current_phase_gantt = task_name
-                task_type = "Phase"
-            elif line_content.startswith("**") and line_content.endswith("**"): # Module
-                task_name = line_content[2:-2].strip()
-                duration = timedelta(weeks=2) # Default module duration, sum of sub-tasks later if possible
-                current_module_gantt = task_name
-                task_type = "Module"
-            elif line_content.startswith("*"): # Task
-                task_name = line_content[1:].strip()
-                duration_match = re.search(r'(\(.*\))', task_name)
-                if duration_match:
-                    duration_text = duration_match.group(1)
-                    task_name = task_name.replace(duration_text, "").strip()
-                duration = parse_duration(duration_text)
-                task_type = "Task"
-
-            if task_name:
-                # Key for progress tracking should match the one used in checkboxes
-                # For phases/modules, we don't have checkboxes yet, so make a unique key
-                if task_type == "Phase":
-                    progress_key = f"phase_{task_name}"
-                elif task_type == "Module":
-                    progress_key = f"{current_phase_gantt}_{task_name}"
-                else: # Task
-                    # This needs to match the checkbox key logic: f"{current_section}_{content_line}"
-                    # We need to reconstruct `current_section` as it was when checkboxes were made.
-                    # This is tricky. For now, let's assume module name is a good proxy for section for tasks.
-                    progress_key = f"{current_module_gantt}_{line_content}"
-
-
-                completed_status = st.session_state.progress.get(progress_key, False)
-
-                roadmap_tasks_for_gantt.append(dict(
-                    Task=task_name,
-                    Start=current_date.strftime("%Y-%m-%d"),
-                    Finish=(current_date + duration).strftime("%Y-%m-%d"),
-                    Resource=current_phase_gantt if task_type != "Phase" else "Project Phases", # Group by phase
-                    Status="Completed" if completed_status else "Pending",
-                    Type=task_type
-                ))
-                if task_type != "Phase": # Only advance date for modules and tasks within a phase
-                    current_date += duration
-
-        if roadmap_tasks_for_gantt:
-            # Ensure overall timeline doesn't exceed ~6 months from the first task for display scaling
-            # This is a rough cap for visualization if total duration is very long.
-            # More sophisticated would be to scale durations proportionally if they exceed 6 months.
-
-            # Create a DataFrame
-            import pandas as pd
-            df_gantt = pd.DataFrame(roadmap_tasks_for_gantt)
-            df_gantt['Start'] = pd.to_datetime(df_gantt['Start'])
-            df_gantt['Finish'] = pd.to_datetime(df_gantt['Finish'])
-
-            # Cap end dates at 6 months from the start of the first task for visualization
-            # overall_project_end_date = df_gantt['Start'].min() + timedelta(days=180)
-            # df_gantt['Finish'] = df_gantt['Finish'].apply(lambda x: min(x, overall_project_end_date))
-
-
-            fig_gantt = px.timeline(
-                df_gantt,
-                x_start="Start",
-                x_end="Finish",
-                y="Task",
-                color="Status",
-                title="Project Timeline",
-                hover_name="Task",
-                color_discrete_map={"Completed": "#10b981", "Pending": "#f59e0b", "Overdue": "#ef4444"}, 
-                category_orders={"Task": df_gantt.sort_values(by="Start")["Task"].tolist()} # Preserve order
-            )
-            fig_gantt.update_yaxes(autorange="reversed") # To display tasks from top to bottom
-            fig_gantt.update_layout(
-                title_font_size=20,
-                font_size=12,
-                plot_bgcolor='rgba(15, 23, 42, 0.4)', 
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color="#f8fafc",
-                legend_title_text='Task Status',
-                font_family="Inter"
-            )
-            st.plotly_chart(fig_gantt, use_container_width=True)
-
-            # "Mark Complete" and "Remind Me" buttons for tasks shown in Gantt
-            st.markdown("---")
-            st.subheader("Timeline Task Actions")
-            selected_gantt_task_name = st.selectbox(
-                "Select a task from timeline to manage:",
-                options=[t['Task'] for t in roadmap_tasks_for_gantt if t['Type'] == 'Task'] # Only individual tasks
-            )
+        # Timeline and checklist rerun on their own when progress changes,
+        # without re-executing the rest of the app
+        @st.fragment
+        def render_progress_tracker():
+            # Load saved progress before the timeline so both views show the same state
+            sync_progress_from_active_roadmap()
+
+            # Visual Timeline (Gantt Chart)
+            st.subheader("🗓️ Visual Timeline (6 Months)")
+
+            roadmap_tree = parse_roadmap(st.session_state.roadmap)
+            gantt_start_date = datetime.now().date()
+            df_gantt = build_gantt_schedule(roadmap_tree.digest, gantt_start_date, st.session_state.roadmap)
+
+            if not df_gantt.empty:
+                fig_gantt = get_gantt_figure(df_gantt, roadmap_tree.digest, gantt_start_date)
+                st.plotly_chart(fig_gantt, use_container_width=True)
+
+                # "Mark Complete" and "Remind Me" buttons for tasks shown in Gantt
+                st.markdown("---")
+                st.subheader("Timeline Task Actions")
+                selected_gantt_task_id = st.selectbox(
+                    "Select a task from timeline to manage:",
+                    options=df_gantt.loc[df_gantt["Type"] == "Task", "TaskId"].tolist(), # Only individual tasks
+                    format_func=lambda tid: roadmap_tree.tasks_by_id[tid].name
+                )
 
-            if selected_gantt_task_name:
-                # Find the original line content for the selected task to build the correct progress_key
-                original_line_for_selected_task = ""
-                # This is a simplification: assuming task names are unique enough for this demo
-                # A more robust solution would involve storing unique IDs for each task during parsing.
-                for r_line in roadmap_lines:
-                    if selected_gantt_task_name in r_line and r_line.strip().startswith("*"):
-                        original_line_for_selected_task = r_line.strip()
-                        break
-
-                # Reconstruct progress key (needs to be robust)
-                # This is still a bit fragile. Finding the exact section header for the task is key.
-                # For now, we'll try to find the module it belongs to.
-                _current_module_for_key = "General" # default
-                for task_info in roadmap_tasks_for_gantt:
-                    if task_info["Task"] == selected_gantt_task_name:
-                        # Find its module by looking at previous items or its resource
-                        for r_task in reversed(roadmap_tasks_for_gantt[:roadmap_tasks_for_gantt.index(task_info)]):
-                            if r_task["Type"] == "Module":
-                                _current_module_for_key = r_task["Task"]
-                                break
-                        break
-
-                # The progress key for a checkbox is `f"{current_section}_{content_line}"`
-                # where current_section is the module name (e.g. "Module 1.1: Introduction to X")
-                # and content_line is the task line (e.g. "* Learn basic syntax (1 week)")
-                # This part is the most complex to get right with current parsing.
-                # The Gantt task name is cleaned, but the progress key uses the raw line.
-
-                # Let's try to find the progress key more directly if possible
-                # This requires matching the cleaned task name back to its original form + section
-                target_progress_key = None
-                for key_iter, val_iter in st.session_state.progress.items():
-                    # Progress keys are like "Section Name_* Task Name (duration)"
-                    if selected_gantt_task_name in key_iter and key_iter.endswith(original_line_for_selected_task):
-                        target_progress_key = key_iter
-                        break
-                # Fallback if exact match not found (e.g. due to name cleaning)
-                if not target_progress_key and original_line_for_selected_task:
-                     # Attempt to find a key that contains the task name and its original line structure
-                    for key_iter, val_iter in st.session_state.progress.items():
-                        if selected_gantt_task_name in key_iter and original_line_for_selected_task.split('(')[0].strip() in key_iter :
-                             target_progress_key = key_iter
-                             break
-
-                if not target_progress_key and original_line_for_selected_task:
-                    # Last resort: construct based on identified module and original line
-                    # This relies on _current_module_for_key being accurately identified for the task
-                    target_progress_key = f"{_current_module_for_key}_{original_line_for_selected_task}"
-
-
-                col_gantt_action1, col_gantt_action2 = st.columns(2)
-                with col_gantt_action1:
-                    if target_progress_key and target_progress_key in st.session_state.progress:
-                        current_status = st.session_state.progress[target_progress_key]
+                if selected_gantt_task_id:
+                    # Task IDs index both the parsed tree and the progress dict directly
+                    selected_gantt_task = roadmap_tree.tasks_by_id[selected_gantt_task_id]
+                    col_gantt_action1, col_gantt_action2 = st.columns(2)
+                    with col_gantt_action1:
+                        current_status = st.session_state.progress.get(selected_gantt_task_id, False)
                         button_label = "Mark as Pending" if current_status else "Mark as Complete"
-                        if st.button(button_label, key=f"gantt_toggle_{selected_gantt_task_name}"):
-                            st.session_state.progress[target_progress_key] = not current_status
-                            save_progress_to_active_roadmap()
-                            st.success(f"Task '{selected_gantt_task_name}' status updated.")
-                            st.rerun() # To update Gantt chart color
-                    else:
-                        st.warning(f"Could not reliably link '{selected_gantt_task_name}' to progress tracker. Progress key: {target_progress_key}")
+                        # Toggled in a callback, so the chart above is recolored in the same fragment run
+                        if st.button(button_label, key=f"gantt_toggle_{selected_gantt_task_id}",
+                                     on_click=toggle_task_progress, args=(selected_gantt_task_id,)):
+                            st.success(f"Task '{selected_gantt_task.name}' status updated.")
 
 
-        else:
-            st.info("No tasks found in the roadmap to display on the timeline.")
-
-        st.markdown("---") # Separator before the old progress tracker
-
-        st.subheader("📈 Progress Tracker (Checklist)")
-        sync_progress_from_active_roadmap()
-
-        # Re-parse roadmap for checklist section, ensuring keys are consistent.
-        # The key challenge is that Gantt parsing might differ slightly from checklist parsing.
-        # The `current_section` for checklist items is typically the module header.
-
-        checklist_roadmap_lines = st.session_state.roadmap.splitlines()
-        checklist_current_section = None # This is usually the module name like "**Module 1.1**"
-        checklist_section_content = []
-
-        # Logic for displaying checkboxes (similar to original)
-        # This section needs to be careful about how `current_section` is defined for tasks
-        # to match the keys used by Gantt chart actions if possible.
-
-        temp_current_section_for_checklist = "Unknown Section" # Default if no section found
-
-        for i, line in enumerate(checklist_roadmap_lines):
-            line = line.strip()
-            if not line:
-                continue
-
-            is_section_header = line.startswith("**") and line.endswith("**")
-            is_phase_header = line.startswith("##")
-
-            if is_phase_header: # A phase header also resets the section for checklist
-                if checklist_current_section and checklist_section_content: # Process previous section
-                    st.markdown(f"### {checklist_current_section}") # Use H3 for modules in checklist
-                    # Edit button logic can remain similar if needed for these sections
-                    # if st.button("Edit Section", key=f"edit_checklist_{temp_current_section_for_checklist.replace(' ','_')}"):
-                    #    st.session_state.editing_section = ... (needs careful index mapping)
-                    for content_line_idx, content_line in enumerate(checklist_section_content):
-                        if content_line.startswith("*"):
-                            item_key = f"{checklist_current_section}_{content_line}"
-                            if item_key not in st.session_state.progress:
-                                st.session_state.progress[item_key] = False
-                            completed = st.checkbox(
-                                f"{content_line[1:]}",
-                                value=st.session_state.progress[item_key],
-                                key=f"check_{checklist_current_section}_{i}_{content_line_idx}" # Ensure unique key
+            else:
+                st.info("No tasks found in the roadmap to display on the timeline.")
+
+            st.markdown("---") # Separator before the old progress tracker
+
+            st.subheader("📈 Progress Tracker (Checklist)")
+
+            # Checklist reads the same parsed tree as the timeline, so progress keys always match
+            for phase in roadmap_tree.phases:
+                if phase.title is not None:
+                    st.markdown(f"## {phase.title}") # Display Phase Name
+                for section in phase.sections:
+                    if not section.items:
+                        continue
+                    st.markdown(f"### {section.title}") # Use H3 for modules in checklist
+                    for item in section.items:
+                        if isinstance(item, RoadmapTask):
+                            st.checkbox(
+                                item.label,
+                                value=st.session_state.progress.get(item.id, False),
+                                key=f"check_{item.id}",
+                                on_change=on_task_checkbox_change, # Saved before the fragment reruns, so the Gantt chart is current
+                                args=(item.id,)
                             )
-                            if completed != st.session_state.progress[item_key]:
-                                st.session_state.progress[item_key] = completed
-                                save_progress_to_active_roadmap()
-                                st.rerun() # To update Gantt chart potentially
                         else:
-                            st.markdown(content_line) # Non-task lines within a section
-
-                st.markdown(f"## {line[2:].strip()}") # Display Phase Name
-                checklist_current_section = None # Reset current module/section under this phase
-                checklist_section_content = []
-                temp_current_section_for_checklist = line[2:].strip() # For context if no module follows
-
-            elif is_section_header: # This is a Module
-                if checklist_current_section and checklist_section_content: # Process previous module's content
-                    st.markdown(f"### {checklist_current_section}")
-                    for content_line_idx, content_line in enumerate(checklist_section_content):
-                        if content_line.startswith("*"):
-                            item_key = f"{checklist_current_section}_{content_line}"
-                            # ... (checkbox logic as above) ...
-                            if item_key not in st.session_state.progress:
-                                st.session_state.progress[item_key] = False
-                            completed = st.checkbox(
-                                f"{content_line[1:]}",
-                                value=st.session_state.progress[item_key],
-                                key=f"check_{checklist_current_section}_{i}_{content_line_idx}"
-                            )
-                            if completed != st.session_state.progress[item_key]:
-                                st.session_state.progress[item_key] = completed
-                                save_progress_to_active_roadmap()
-                                st.rerun()
-                        else:
-                            st.markdown(content_line)
-
-                checklist_current_section = line[2:-2].strip() # New module name
-                checklist_section_content = []
-                # No st.markdown(f"### {checklist_current_section}") here, done when section is processed or new one starts
-
-            elif checklist_current_section: # This line is content for the current module
-                checklist_section_content.append(line)
-            elif temp_current_section_for_checklist and not is_phase_header and not is_section_header : # Content under a phase but not in a module yet
-                 # This case might be rare if roadmap structure is Phase > Module > Task
-                 # For now, treat as part of the phase or a general section
-                if not checklist_section_content : st.markdown(f"### Tasks for {temp_current_section_for_checklist}")
-                checklist_section_content.append(line)
-                if checklist_current_section is None: checklist_current_section = temp_current_section_for_checklist # Assign phase as section if no module
-
-
-        # Process the last section
-        if checklist_current_section and checklist_section_content:
-            st.markdown(f"### {checklist_current_section}")
-            # Edit button for last section
-            # if st.button("Edit Section", key=f"edit_checklist_last_{checklist_current_section.replace(' ','_')}"):
-            #    st.session_state.editing_section = ...
-            for content_line_idx, content_line in enumerate(checklist_section_content):
-                if content_line.startswith("*"):
-                    item_key = f"{checklist_current_section}_{content_line}"
-                    if item_key not in st.session_state.progress:
-                        st.session_state.progress[item_key] = False
-                    completed = st.checkbox(
-                        f"{content_line[1:]}",
-                        value=st.session_state.progress[item_key],
-                        key=f"check_last_{checklist_current_section}_{content_line_idx}" # Unique key for last items
-                    )
-                    if completed != st.session_state.progress[item_key]:
-                        st.session_state.progress[item_key] = completed
-                        save_progress_to_active_roadmap()
-                        st.rerun()
-                else:
-                    st.markdown(content_line)
-
-        # Fallback for content that might not be under any section (should be rare)
-        elif not checklist_current_section and checklist_section_content:
-             st.markdown(f"### Other Items")
-             for content_line_idx, content_line in enumerate(checklist_section_content):
-                if content_line.startswith("*"):
-                    # Simplified key if no section
-                    item_key = f"general_{content_line}"
-                    if item_key not in st.session_state.progress:
-                        st.session_state.progress[item_key] = False
-                    completed = st.checkbox(
-                        f"{content_line[1:]}",
-                        value=st.session_state.progress[item_key],
-                        key=f"check_other_{content_line_idx}"
-                    )
-                    if completed != st.session_state.progress[item_key]:
-                        st.session_state.progress[item_key] = completed
-                        save_progress_to_active_roadmap()
-                        st.rerun()
-                else:
-                    st.markdown(content_line)
-
+                            st.markdown(item) # Non-task lines within a section
 
+        render_progress_tracker()
 
         st.subheader("❓ Ask About Your Roadmap")
         question = st.text_input("Enter your question (e.g., 'How long will SQL take?')")
@@ -881,10 +753,9 @@ with tab2:
                 else:
                     try:
                         with st.spinner("Fetching answer..."):
-                            genai.configure(api_key=st.session_state.gemini_api_key)
-                            model = genai.GenerativeModel("gemini-1.5-flash")
-                            response = model.generate_content(f"Roadmap: {st.session_state.roadmap}\nQuestion: {question}")
-                            st.markdown(response.text)
+                            answer = llm_gateway.generate(f"Roadmap: {st.session_state.roadmap}\nQuestion: {question}", model=QA_MODEL,
+                                                          api_key=st.session_state.gemini_api_key)
+                            st.markdown(answer)
                     except Exception as e:
                         st.error(f"❌ Error fetching answer: {e}")
             else:
@@ -1105,12 +976,11 @@ with tab2:
                 y_position -= 0.3 * inch
 
             # Process roadmap content with enhanced styling
-            lines = st.session_state.roadmap.splitlines()
             current_phase = None
             bullet_indent = left_margin + 0.3 * inch
 
-            for line in lines:
-                line = clean_text(line.strip())
+            for roadmap_line in parse_roadmap(st.session_state.roadmap).lines:
+                line = clean_text(roadmap_line.text)
                 if not line:
                     continue
 
@@ -1121,15 +991,15 @@ with tab2:
                     draw_header()
                     y_position = height - top_margin - 0.5 * inch
 
-                if line.startswith("##"):
+                if roadmap_line.kind == PHASE:
                     # Phase header
-                    text = line[2:].strip()
+                    text = line
                     y_position = draw_section_header(text, y_position, is_phase=True)
                     current_phase = text
 
-                elif line.startswith("**") and line.endswith("**"):
+                elif roadmap_line.kind == MODULE:
                     # Subsection header
-                    text = line[2:-2].strip()
+                    text = line
                     if y_position < bottom_margin + 2 * inch:
                         draw_footer(page_num)
                         c.showPage()
@@ -1139,9 +1009,9 @@ with tab2:
 
                     y_position = draw_section_header(text, y_position, is_phase=False)
 
-                elif line.startswith("-"):
+                elif roadmap_line.kind in (TASK, BULLET):
                     # Main bullet point
-                    text = line[1:].strip()
+                    text = line
                     
                     if ":" in text:
                         title, description = text.split(":", 1)
@@ -1172,39 +1042,6 @@ with tab2:
                             content_width - 0.3 * inch, "Helvetica", 12, line_spacing=16
                         )
 
-                elif line.startswith("  •"):
-                    # Sub bullet point
-                    text = line[3:].strip()
-                    
-                    if ":" in text:
-                        title, description = text.split(":", 1)
-                        title = title.strip()
-                        description = description.strip()
-                        
-                        # Draw sub-bullet point with enhanced styling
-                        c.setFont("Helvetica-Bold", 11)
-                        c.setFillColor(accent_color)
-                        y_position = wrap_text(
-                            c, f"  ◦ {title}:", bullet_indent + 0.2 * inch, y_position, 
-                            content_width - 0.5 * inch, "Helvetica-Bold", 11, line_spacing=14
-                        )
-                        
-                        # Draw description with enhanced styling
-                        c.setFont("Helvetica", 10)
-                        c.setFillColor(text_color)
-                        y_position = wrap_text(
-                            c, f"    {description}", bullet_indent + 0.4 * inch, y_position, 
-                            content_width - 0.7 * inch, "Helvetica", 10, line_spacing=12
-                        )
-                    else:
-                        # Regular sub-bullet point with enhanced styling
-                        c.setFont("Helvetica", 11)
-                        c.setFillColor(text_color)
-                        y_position = wrap_text(
-                            c, f"  ◦ {text}", bullet_indent + 0.2 * inch, y_position, 
-                            content_width - 0.5 * inch, "Helvetica", 11, line_spacing=14
-                        )
-
                 else:
                     # Regular text with enhanced styling
                     c.setFont("Helvetica", 11)
@@ -1264,26 +1101,13 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-ROADMAPS_DB_PATH = os.path.join(os.path.dirname(__file__), "roadmaps_db.json")
-
 # --- Persistent Roadmap Management ---
 
 # --- On App Start: Load and display previous roadmaps ---
-if "roadmaps_db" not in st.session_state:
-    st.session_state.roadmaps_db = load_roadmaps_db()
-
-# Find active roadmap
-active_roadmap = None
-for r in st.session_state.roadmaps_db:
-    if r.get("active"):
-        active_roadmap = r
-        break
-
-# If no active roadmap, set the most recent as active
-if not active_roadmap and st.session_state.roadmaps_db:
-    st.session_state.roadmaps_db[0]["active"] = True
-    active_roadmap = st.session_state.roadmaps_db[0]
-    save_roadmaps_db(st.session_state.roadmaps_db)
+roadmap_store = get_roadmap_store()
+
+# Find active roadmap; if none, the most recent becomes active
+active_roadmap = roadmap_store.ensure_active()
 
 # Load active roadmap into session
 if active_roadmap:
@@ -1293,27 +1117,83 @@ if active_roadmap:
     st.session_state.roadmap = active_roadmap["roadmap"]
 
 # --- UI: Recent Roadmaps Sidebar ---
-with st.sidebar:
+RECENT_ROADMAPS_PAGE_SIZE = 10
+def set_delete_confirmation(saved_roadmap_id, pending):
+    if pending:
+        st.session_state[f'confirm_delete_{saved_roadmap_id}'] = True
+    else:
+        st.session_state.pop(f'confirm_delete_{saved_roadmap_id}', None)
+
+def delete_saved_roadmap(saved_roadmap_id, was_active):
+    get_roadmap_store().delete_roadmap(saved_roadmap_id)
+    st.session_state.pop(f'confirm_delete_{saved_roadmap_id}', None)
+    # Handled at the top of the sidebar fragment, outside the callback
+    st.session_state.deleted_roadmap = {"active": was_active}
+
+def load_saved_roadmap(saved_roadmap_id):
+    roadmap_store.set_active(saved_roadmap_id)
+    r = roadmap_store.get_roadmap(saved_roadmap_id)
+    st.session_state.resume_text = r["resume"]
+    st.session_state.goal = r["goal"]
+    st.session_state.role = r["role"]
+    st.session_state.roadmap = r["roadmap"]
+
+def export_version(summary):
+    # Changes whenever the exported record would: content/progress (version) or its active state
+    return (summary["id"], summary["version"], summary["last_accessed"], summary["active"])
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def export_roadmap_json(version):
+    """JSON export of one saved roadmap with its progress, built on first download and cached per record version."""
+    records = get_roadmap_store().export_roadmaps([version[0]])
+    return json.dumps(records[0] if records else {}, indent=2)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def export_search_json(search_query, match_signature):
+    """JSON export of every roadmap matching the sidebar search, cached until any match changes."""
+    store = get_roadmap_store()
+    ids = [r["id"] for r in store.list_roadmap_summaries(search_query)]
+    return json.dumps(store.export_roadmaps(ids), indent=2)
+
+def set_recent_roadmaps_page(page):
+    st.session_state.recent_roadmaps_page = page
+
+# A fragment, so searching and confirming deletes rerun only the sidebar
+@st.fragment
+def recent_roadmaps_sidebar():
+    deleted = st.session_state.get("deleted_roadmap")
+    if deleted and deleted["active"]:
+        deleted["active"] = False
+        st.rerun(scope="app")  # Deleting the active roadmap affects the rest of the page
+    if st.session_state.pop("deleted_roadmap", None):
+        st.toast("Roadmap deleted.")
     st.markdown("---", unsafe_allow_html=True)
     st.header("🗂️ Your Recent Roadmaps")
-    # Search/filter box
-    search_query = st.text_input("🔍 Search by role or goal", "")
-    filtered_roadmaps = st.session_state.roadmaps_db
-    if search_query.strip():
-        sq = search_query.lower()
-        filtered_roadmaps = [r for r in st.session_state.roadmaps_db if sq in r["role"].lower() or sq in r["goal"].lower()]
-    # Export all button
+    # Search/filter box (full-text search over role, goal and roadmap)
+    search_query = st.text_input("🔍 Search by role, goal or roadmap", "").strip()
+    if st.session_state.get("recent_roadmaps_query") != search_query:
+        st.session_state.recent_roadmaps_query = search_query
+        st.session_state.recent_roadmaps_page = 0
+    match_count, match_signature = roadmap_store.search_stats(search_query)
+    page_count = max(1, -(-match_count // RECENT_ROADMAPS_PAGE_SIZE))
+    page = min(st.session_state.get("recent_roadmaps_page", 0), page_count - 1)
+    # Only the current page is loaded, most recently accessed first; summaries leave out the resume and roadmap texts
+    filtered_roadmaps = roadmap_store.list_roadmap_summaries(
+        search_query, limit=RECENT_ROADMAPS_PAGE_SIZE, offset=page * RECENT_ROADMAPS_PAGE_SIZE
+    )
+    # Export all button; the file is only built when clicked
     if filtered_roadmaps:
         st.download_button(
             "⬇️ Export All",
-            data=json.dumps(filtered_roadmaps, indent=2),
+            data=partial(export_search_json, search_query, match_signature),
             file_name="SkillWise_All_Roadmaps.json",
             mime="application/json",
-            key="export_all_btn"
+            key="export_all_btn",
+            on_click="ignore"
         )
     st.markdown("<div style='margin-bottom: 10px;'></div>", unsafe_allow_html=True)
     if filtered_roadmaps:
-        for idx, r in enumerate(sorted(filtered_roadmaps, key=lambda x: x.get("last_accessed", x["timestamp"]), reverse=True)):
+        for idx, r in enumerate(filtered_roadmaps):
             is_active = r.get("active", False)
             with st.container():
                 st.markdown(f"<div style='border:2px solid {'#60a5fa' if is_active else '#444'}; border-radius:10px; padding:10px; margin-bottom:10px; background-color:{'#23234a' if is_active else '#191932'}'>", unsafe_allow_html=True)
@@ -1324,105 +1204,53 @@ with st.sidebar:
                 if is_active:
                     st.success("Active Roadmap")
                 
-                disabled = st.session_state.get("is_processing", False)
+                disabled = st.session_state.get("is_processing", False) or roadmap_job_active()
 
                 # Continue Button
                 if st.button("Continue", key=f"cont_{r['id']}", disabled=disabled):
-                    for rr in st.session_state.roadmaps_db:
-                        rr["active"] = (rr["id"] == r["id"])
-                        if rr["active"]:
-                            rr["last_accessed"] = datetime.now().isoformat()
-                    save_roadmaps_db(st.session_state.roadmaps_db)
-                    st.session_state.resume_text = r["resume"]
-                    st.session_state.goal = r["goal"]
-                    st.session_state.role = r["role"]
-                    st.session_state.roadmap = r["roadmap"]
+                    load_saved_roadmap(r["id"])
                     st.toast("Roadmap continued and set as active.")
                     st.rerun()
 
                 # Delete Button
+                # Confirmation state changes happen in callbacks, so only the sidebar reruns
                 if not st.session_state.get(f'confirm_delete_{r["id"]}'):
-                    if st.button("Delete", key=f"del_{r['id']}", disabled=disabled):
-                        st.session_state[f'confirm_delete_{r["id"]}'] = True
-                        st.rerun()
+                    st.button("Delete", key=f"del_{r['id']}", disabled=disabled,
+                              on_click=set_delete_confirmation, args=(r["id"], True))
                 else:
                     st.warning(f"Delete '{r['goal']}'?")
                     col_confirm_yes, col_confirm_no = st.columns(2)
                     with col_confirm_yes:
-                        if st.button("Yes", key=f"confirm_yes_{r['id']}"):
-                            st.session_state.roadmaps_db = [rr for rr in st.session_state.roadmaps_db if rr["id"] != r["id"]]
-                            save_roadmaps_db(st.session_state.roadmaps_db)
-                            st.toast("Roadmap deleted.")
-                            del st.session_state[f'confirm_delete_{r["id"]}']
-                            st.rerun()
+                        st.button("Yes", key=f"confirm_yes_{r['id']}",
+                                  on_click=delete_saved_roadmap, args=(r["id"], is_active))
                     with col_confirm_no:
-                        if st.button("No", key=f"confirm_no_{r['id']}"):
-                            del st.session_state[f'confirm_delete_{r["id"]}']
-                            st.rerun()
+                        st.button("No", key=f"confirm_no_{r['id']}",
+                                  on_click=set_delete_confirmation, args=(r["id"], False))
 
                 # Export Button
-                st.download_button("Export", data=json.dumps(r, indent=2), file_name=f"SkillWise_Roadmap_{r['id']}.json", mime="application/json", key=f"exp_{r['id']}", disabled=disabled)
+                st.download_button("Export", data=partial(export_roadmap_json, export_version(r)), file_name=f"SkillWise_Roadmap_{r['id']}.json", mime="application/json", key=f"exp_{r['id']}", disabled=disabled, on_click="ignore")
 
                 # Set Active Button
                 if not is_active:
                     if st.button("⭐ Set Active", key=f"set_{r['id']}", disabled=disabled):
-                        for rr in st.session_state.roadmaps_db:
-                            rr["active"] = (rr["id"] == r["id"])
-                            if rr["active"]:
-                                rr["last_accessed"] = datetime.now().isoformat()
-                        save_roadmaps_db(st.session_state.roadmaps_db)
-                        st.session_state.resume_text = r["resume"]
-                        st.session_state.goal = r["goal"]
-                        st.session_state.role = r["role"]
-                        st.session_state.roadmap = r["roadmap"]
+                        load_saved_roadmap(r["id"])
                         st.toast("Roadmap set as active.")
                         st.rerun()
                 st.markdown("</div>", unsafe_allow_html=True)
+        if page_count > 1:
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                st.button("◀", key="recent_roadmaps_prev", disabled=page == 0,
+                          on_click=set_recent_roadmaps_page, args=(page - 1,))
+            with col_page:
+                st.caption(f"Page {page + 1} of {page_count} ({match_count} roadmaps)")
+            with col_next:
+                st.button("▶", key="recent_roadmaps_next", disabled=page >= page_count - 1,
+                          on_click=set_recent_roadmaps_page, args=(page + 1,))
+    elif search_query:
+        st.info("No saved roadmaps match your search.")
     else:
         st.info("No saved roadmaps yet. Generate one to get started!")
 
-# --- On New Roadmap Generation: Check for existing, else create new ---
-# In the code where you generate a new roadmap (after parsing resume, role, goal):
-# Before generating, check if exists
-# (Insert this logic before calling generate_roadmap)
-# ...
-# Example (inside the button click handler):
-#
-# new_id = roadmap_id(st.session_state.resume_text, st.session_state.goal, effective_role)
-# found = None
-# for r in st.session_state.roadmaps_db:
-#     if r["id"] == new_id:
-#         found = r
-#         break
-# if found:
-#     # Load existing
-#     for rr in st.session_state.roadmaps_db:
-#         rr["active"] = (rr["id"] == found["id"])
-#         if rr["active"]:
-#             rr["last_accessed"] = datetime.now().isoformat()
-#     save_roadmaps_db(st.session_state.roadmaps_db)
-#     st.session_state.resume_text = found["resume"]
-#     st.session_state.goal = found["goal"]
-#     st.session_state.role = found["role"]
-#     st.session_state.roadmap = found["roadmap"]
-#     st.success("Loaded existing roadmap for this resume/goal/role.")
-#     st.rerun()
-# else:
-#     # Generate new, then save
-#     # ... after generating roadmap ...
-#     new_roadmap = {
-#         "id": new_id,
-#         "resume": st.session_state.resume_text,
-#         "goal": st.session_state.goal,
-#         "role": effective_role,
-#         "roadmap": st.session_state.roadmap,
-#         "timestamp": datetime.now().isoformat(),
-#         "last_accessed": datetime.now().isoformat(),
-#         "active": True
-#     }
-#     for rr in st.session_state.roadmaps_db:
-#         rr["active"] = False
-#     st.session_state.roadmaps_db.insert(0, new_roadmap)
-#     save_roadmaps_db(st.session_state.roadmaps_db)
-#     st.success("New roadmap saved and set as active.")
-#     st.rerun()
+with st.sidebar:
+    recent_roadmaps_sidebar()
@@ -0,0 +1,188 @@
+# batch_generate.py
+"""
+Generate roadmaps for a whole directory of resumes without the Streamlit UI.
+
+Usage:
+    python batch_generate.py resumes/ --roles cohort.csv
+    python batch_generate.py resumes/ --role "Data Scientist" --goal "Land a first DS job"
+
+Resumes are PDFs or LinkedIn JSON exports. The optional CSV maps each file
+name to a role and goal (columns: file, role, goal); files it does not list
+use --role/--goal. Finished resumes are recorded in a checkpoint file, so an
+interrupted run picks up where it stopped when started again.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Tuple
+
+import llm_gateway
+from resume_parser import parse_linkedin_json, parse_resume_cached
+from roadmap_generator import build_roadmap_prompt, generate_roadmap
+from roadmap_store import LEGACY_JSON_PATH, ROADMAPS_DB_PATH, RoadmapStore, roadmap_id
+from smart_gap_analyzer import get_smart_gap_analysis
+
+RESUME_EXTENSIONS = (".pdf", ".json")
+CHECKPOINT_FILENAME = ".skillwise_checkpoint.jsonl"
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
+DEFAULT_LLM_WORKERS = llm_gateway.MAX_CONCURRENCY_PER_MODEL
+
+class BatchGenerationError(Exception):
+    """Custom exception for batch roadmap generation errors."""
+    pass
+
+def load_roles_csv(path: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Read the file -> (role, goal) mapping from a CSV with file, role and goal columns.
+
+    Raises:
+        BatchGenerationError: If a required column is missing
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = {"file", "role"} - set(reader.fieldnames or [])
+        if missing:
+            raise BatchGenerationError(f"{path} is missing column(s): {', '.join(sorted(missing))}")
+        return {row["file"].strip(): (row["role"].strip(), (row.get("goal") or "").strip())
+                for row in reader if row["file"] and row["file"].strip()}
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    """Return completed entries from the checkpoint file, keyed by their job key."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by an interrupted run
+            if entry.get("status") == "done":
+                done[entry["key"]] = entry
+    return done
+
+def job_key(file_hash: str, role: str, goal: str) -> str:
+    """Checkpoint key: the same file with the same role and goal is only generated once."""
+    return hashlib.sha256("\x1f".join((file_hash, role, goal)).encode("utf-8")).hexdigest()[:16]
+
+def parse_resume_file(path: str) -> str:
+    """Extract resume text from a PDF or LinkedIn JSON export (runs in a worker process)."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return parse_linkedin_json(json.load(f))
+    with open(path, "rb") as f:
+        # Parsing workers already run in parallel; OCR inline rather than each starting its own OCR pool
+        return parse_resume_cached(f.read(), ocr_workers=1)[0]
+
+def generate_for_resume(resume_text: str, role: str, goal: str, gap_dir: Optional[str] = None) -> Dict:
+    """
+    Run the LLM stages for one parsed resume (runs in a worker thread).
+
+    Returns:
+        dict: The roadmap record, ready for RoadmapStore.add_roadmap
+    """
+    record = {
+        "id": roadmap_id(resume_text, goal, role),
+        "resume": resume_text,
+        "goal": goal,
+        "role": role,
+        "roadmap": generate_roadmap(build_roadmap_prompt(resume_text, role, goal)),
+    }
+    if gap_dir:
+        analysis = get_smart_gap_analysis(resume_text, role, goal)
+        with open(os.path.join(gap_dir, f"{record['id']}.md"), "w", encoding="utf-8") as f:
+            f.write(analysis)
+    return record
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate SkillWise roadmaps for a directory of resumes.")
+    parser.add_argument("input_dir", help="Directory of resume PDFs and LinkedIn JSON exports")
+    parser.add_argument("--roles", help="CSV with file, role and goal columns")
+    parser.add_argument("--role", help="Role for files not listed in --roles")
+    parser.add_argument("--goal", default="", help="Career goal for files not listed in --roles")
+    parser.add_argument("--db", default=ROADMAPS_DB_PATH, help="Roadmap database to write to (default: %(default)s)")
+    parser.add_argument("--checkpoint", help=f"Checkpoint file (default: <input_dir>/{CHECKPOINT_FILENAME})")
+    parser.add_argument("--gap-dir", help="Also run the smart gap analysis and write it here as <roadmap id>.md")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS, help="Resume parsing processes (default: %(default)s)")
+    parser.add_argument("--llm-workers", type=int, default=DEFAULT_LLM_WORKERS, help="Concurrent LLM requests (default: %(default)s)")
+    parser.add_argument("--api-key", default=os.getenv("GEMINI_API_KEY", ""), help="Gemini API key (default: $GEMINI_API_KEY)")
+    return parser
+
+def run(args: argparse.Namespace) -> int:
+    """Run a batch; returns the number of resumes that failed."""
+    if not args.api_key:
+        raise BatchGenerationError("No Gemini API key: pass --api-key or set GEMINI_API_KEY.")
+    llm_gateway.configure(args.api_key)
+
+    roles = load_roles_csv(args.roles) if args.roles else {}
+    files = sorted(name for name in os.listdir(args.input_dir) if name.lower().endswith(RESUME_EXTENSIONS))
+    jobs = []
+    for name in files:
+        role, goal = roles.get(name, (args.role, args.goal))
+        if not role:
+            print(f"skip  {name}: no role (add it to --roles or pass --role)", file=sys.stderr)
+            continue
+        with open(os.path.join(args.input_dir, name), "rb") as f:
+            file_hash = hashlib.sha256(f.read()).hexdigest()
+        jobs.append((name, role, goal, job_key(file_hash, role, goal)))
+
+    checkpoint_path = args.checkpoint or os.path.join(args.input_dir, CHECKPOINT_FILENAME)
+    done = load_checkpoint(checkpoint_path)
+    pending = [job for job in jobs if job[3] not in done]
+    print(f"{len(jobs)} resumes, {len(jobs) - len(pending)} already done, {len(pending)} to generate")
+    if args.gap_dir:
+        os.makedirs(args.gap_dir, exist_ok=True)
+
+    # Only the app's own database takes over roadmaps from the legacy JSON file
+    store = RoadmapStore(path=args.db, legacy_json_path=LEGACY_JSON_PATH if args.db == ROADMAPS_DB_PATH else None)
+    failures = 0
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=max(1, args.parse_workers), mp_context=multiprocessing.get_context("spawn")) as parse_pool, \
+            ThreadPoolExecutor(max_workers=max(1, args.llm_workers), thread_name_prefix="skillwise-batch") as llm_pool, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        def record_result(job, status, **fields):
+            name, role, goal, key = job
+            checkpoint.write(json.dumps({"key": key, "file": name, "role": role, "goal": goal, "status": status, **fields}) + "\n")
+            checkpoint.flush()
+
+        # Parsed resumes move straight on to the LLM stage; results are checkpointed as they finish
+        in_flight = {parse_pool.submit(parse_resume_file, os.path.join(args.input_dir, job[0])): ("parse", job) for job in pending}
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, job = in_flight.pop(future)
+                try:
+                    result = future.result()
+                    if stage == "parse":
+                        in_flight[llm_pool.submit(generate_for_resume, result, job[1], job[2], args.gap_dir)] = ("generate", job)
+                        continue
+                    store.add_roadmap(result, activate=False)
+                except Exception as e:
+                    failures += 1
+                    print(f"fail  {job[0]}: {e}", file=sys.stderr)
+                    record_result(job, "failed", error=str(e))
+                    continue
+                print(f"done  {job[0]} -> {result['id']}")
+                record_result(job, "done", roadmap_id=result["id"])
+
+    print(f"Finished in {time.time() - started:.1f}s: {len(pending) - failures} generated, {failures} failed")
+    return failures
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return 1 if run(args) else 0
+    except BatchGenerationError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+# The guard is required: worker processes are spawned and re-import this module
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# disk_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+CACHE_DIR = os.getenv("SKILLWISE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+
+def make_key(*parts) -> str:
+    """Build a content-addressed cache key from the given parts."""
+    base = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return hashlib.sha256(base).hexdigest()
+
+
+class DiskCache:
+    """
+    Persistent key/value cache stored in a local SQLite file.
+
+    Entries expire after `ttl` seconds and the least recently used entries
+    are evicted once the cache grows past `max_entries` or `max_bytes`.
+    The file is shared by every process and session on the host, so cached
+    values survive restarts.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_entries: int = 1000,
+                 max_bytes: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_accessed ON cache(last_accessed)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str, default: Any = None, max_age: Optional[float] = None) -> Any:
+        """
+        Return the cached value for `key`, or `default` if missing or expired.
+
+        `max_age` additionally limits how old an entry may be for this lookup,
+        so callers that share one cache can each decide how stale is acceptable.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return default
+                value, created_at = row
+                if self.ttl is not None and now - created_at > self.ttl:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return default
+                if max_age is not None and now - created_at > max_age:
+                    return default  # Too old for this caller, but not expired for others
+                conn.execute("UPDATE cache SET last_accessed = ? WHERE key = ?", (now, key))
+            return json.loads(value)
+        except (sqlite3.Error, ValueError):
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under `key` and enforce the size cap."""
+        payload = json.dumps(value)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error:
+            pass  # A cache write failure should never break the caller
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under the caps."""
+        if self.ttl is not None:
+            conn.execute("DELETE FROM cache WHERE created_at < ?", (now - self.ttl,))
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if self.max_entries and count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_accessed ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        if self.max_bytes:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while total > self.max_bytes:
+                row = conn.execute("SELECT key, size FROM cache ORDER BY last_accessed ASC LIMIT 1").fetchone()
+                if row is None:
+                    break
+                conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+                total -= row[1]
@@ -1,21 +1,32 @@
-import os
-import google.generativeai as genai
+import hashlib
+import llm_gateway
+from disk_cache import make_key
+from llm_gateway import GOAL_MODEL
 
-def analyze_goals(text):
-    """Analyze career goals using Gemini AI model."""
+GOAL_CACHE_TTL = 7 * 24 * 60 * 60  # One week
+
+GOAL_PROMPT_TEMPLATE = (
+    "Analyze the following career goal and extract the main skills, roles, and relevant keywords. "
+    "Present the analysis in a clear, user-friendly way:\n\n{goal}"
+)
+GOAL_PROMPT_HASH = hashlib.sha256(GOAL_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+
+def normalize_goal(text):
+    """Normalize goal text so trivially different inputs share a cache entry."""
+    return " ".join(text.lower().split())
+
+def analyze_goals(text, api_key=None):
+    """Analyze career goals using Gemini AI model, with the given (e.g. the session's) API key."""
     if not text or not isinstance(text, str):
         return "⚠️ Please provide a valid career goal text."
+    gateway = llm_gateway.get_gateway()
+    if not gateway.has_key(api_key):
+        return "⚠️ Gemini API key not set. Please enter it in the sidebar."
     try:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            return "⚠️ Gemini API key not set. Please enter it in the sidebar."
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        prompt = (
-            f"Analyze the following career goal and extract the main skills, roles, and relevant keywords. "
-            f"Present the analysis in a clear, user-friendly way:\n\n{text}"
-        )
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        prompt = GOAL_PROMPT_TEMPLATE.format(goal=text.strip())
+        # Cached in the shared response cache by model, prompt template and normalized goal
+        cache_key = make_key(GOAL_MODEL, GOAL_PROMPT_HASH, normalize_goal(text))
+        return gateway.generate(prompt, model=GOAL_MODEL, cache_ttl=GOAL_CACHE_TTL, cache_key=cache_key,
+                                api_key=api_key)
     except Exception as e:
         return f"⚠️ Error analyzing goal with AI: {str(e)}"
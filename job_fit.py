@@ -0,0 +1,246 @@
+# job_fit.py
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+import llm_gateway
+from lexical_fit import lexical_fit, passes_prescreen
+from llm_gateway import JOB_FIT_MODEL, RESPONSE_CACHE_TTL
+from prompt_builder import FOCUSED_ROADMAP_PROMPT, JOB_FIT_PROMPT, pack_prompt
+from roadmap_generator import generate_roadmap
+
+MAX_FIT_WORKERS = int(os.getenv("SKILLWISE_FIT_WORKERS", "4"))
+
+# Result names yielded by analyze_fit_and_roadmap
+FIT_ANALYSIS = "fit_analysis"
+FOCUSED_ROADMAP = "focused_roadmap"
+
+# Fields tried, in order, for the description and title of a JSONL job posting
+JSONL_DESCRIPTION_FIELDS = ("description", "job_description", "text", "jd")
+JSONL_TITLE_FIELDS = ("title", "job_title", "name", "id")
+
+_FIT_SCORE_RE = re.compile(r"Fit Score\W*(\d{1,3})(?:\.\d+)?\s*%", re.IGNORECASE)
+_JD_SEPARATOR_RE = re.compile(r"^\s*(?:-{3,}|={3,})\s*$", re.MULTILINE)
+# Job suffix added by focused_roadmap_goal, e.g. " (focused on job: Data Analyst [1a2b3c4d])"
+_FOCUSED_JOB_RE = re.compile(r"\s*\(focused on job: .*\[[0-9a-f]{8}\]\)$|^Focused on job: .*\[[0-9a-f]{8}\]$")
+
+class JobFitError(Exception):
+    """Custom exception for job fit analysis errors."""
+    pass
+
+def build_fit_prompt(resume_text: str, job_description: str, api_key: Optional[str] = None) -> str:
+    """Prompt asking how well the resume matches one job description, ending in a fit score."""
+    return pack_prompt(_fit_prompt, JOB_FIT_PROMPT, resume_text, job_description=job_description, api_key=api_key)
+
+def build_focused_roadmap_prompt(resume_text: str, job_description: str, goal: str, role: str,
+                                 api_key: Optional[str] = None) -> str:
+    """Prompt for a roadmap aimed at the gaps for one job description."""
+    return pack_prompt(lambda resume, jd: _focused_roadmap_prompt(resume, jd, goal, role),
+                       FOCUSED_ROADMAP_PROMPT, resume_text, role, goal, job_description=job_description, api_key=api_key)
+
+def _fit_prompt(resume_text: str, job_description: str) -> str:
+    return (
+        f"My resume is:\n---\n{resume_text}\n---\n\n"
+        f"The job description is:\n---\n{job_description}\n---\n\n"
+        "Please provide a concise analysis of how well my resume matches this specific job description. "
+        "Highlight key strengths and specific gaps or missing qualifications relevant to this job. "
+        "Conclude with a percentage fit score (e.g., Fit Score: 75%)."
+    )
+
+def _focused_roadmap_prompt(resume_text: str, job_description: str, goal: str, role: str) -> str:
+    return (
+        f"My resume is:\n---\n{resume_text}\n---\n\n"
+        f"The target job description is:\n---\n{job_description}\n---\n\n"
+        f"My previous general career goal was '{goal}' for the role of '{role}'.\n\n"
+        "Now, generate a highly focused 6-month learning roadmap to specifically address the gaps and requirements for THIS job description. "
+        "Prioritize skills and experiences mentioned in the job description. "
+        "Suggest concrete learning steps, resources (like specific types of courses or projects), and how they help bridge the gap for this particular job. "
+        "The output should be a structured roadmap."
+    )
+
+def analyze_job_fit(resume_text: str, job_description: str, api_key: Optional[str] = None) -> str:
+    """
+    Analyze how well a resume fits a job description.
+
+    Args:
+        resume_text (str): The text of the user's resume
+        job_description (str): The job description text
+        api_key (str): Gemini API key, e.g. the session's; None uses the gateway's default
+
+    Returns:
+        str: Narrative fit analysis ending with "Fit Score: NN%"
+
+    Raises:
+        JobFitError: If the analysis fails
+    """
+    try:
+        return llm_gateway.generate(build_fit_prompt(resume_text, job_description, api_key), model=JOB_FIT_MODEL,
+                                    cache_ttl=RESPONSE_CACHE_TTL, api_key=api_key)
+    except Exception as e:
+        raise JobFitError(f"Failed to analyze job fit: {str(e)}")
+
+def analyze_fit_and_roadmap(resume_text: str, job_description: str, goal: str,
+                            role: str, api_key: Optional[str] = None) -> Iterator[Tuple[str, Optional[str], Optional[Exception]]]:
+    """
+    Run the fit analysis and the focused roadmap concurrently.
+
+    The focused roadmap does not depend on the analysis, so both requests
+    are issued at once and results are yielded in completion order. A
+    failure in one does not affect the other.
+
+    Args:
+        resume_text (str): The text of the user's resume
+        job_description (str): The job description text
+        goal (str): The user's general career goal
+        role (str): The user's target role
+        api_key (str): Gemini API key, e.g. the session's; None uses the gateway's default
+
+    Yields:
+        tuple: (name, result, error) where name is FIT_ANALYSIS or FOCUSED_ROADMAP
+        and exactly one of result and error is set
+    """
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="skillwise-fit") as executor:
+        futures = {
+            executor.submit(analyze_job_fit, resume_text, job_description, api_key): FIT_ANALYSIS,
+            # The prompt is built in the worker too: condensing a long resume calls the LLM
+            executor.submit(
+                lambda: generate_roadmap(build_focused_roadmap_prompt(resume_text, job_description, goal, role, api_key),
+                                         api_key=api_key)
+            ): FOCUSED_ROADMAP,
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+def focused_roadmap_goal(goal: str, job_description: str) -> str:
+    """
+    Goal stored with a focused roadmap, naming the job it targets.
+
+    It includes a digest of the description, so the roadmap_id built from
+    it is unique per job and matches the stored record. A goal that already
+    names a job, as when a focused roadmap is the active one, is retargeted.
+    """
+    goal = _FOCUSED_JOB_RE.sub("", goal or "").strip()
+    title = next((line.strip() for line in job_description.splitlines() if line.strip()), "")
+    if len(title) > 60:
+        title = title[:57].rstrip() + "..."
+    digest = hashlib.sha256(job_description.strip().encode("utf-8")).hexdigest()[:8]
+    job = f"{title} [{digest}]" if title else f"[{digest}]"
+    return f"{goal} (focused on job: {job})" if goal else f"Focused on job: {job}"
+
+def parse_fit_score(analysis: str) -> Optional[int]:
+    """Extract the percentage from the "Fit Score: NN%" line of an analysis, if present."""
+    matches = _FIT_SCORE_RE.findall(analysis or "")
+    if not matches:
+        return None
+    return min(int(matches[-1]), 100)  # The conclusion comes last
+
+def split_job_descriptions(text: str) -> List[str]:
+    """Split a multi-document paste on lines of "---" or "===" into non-empty descriptions."""
+    return [part.strip() for part in _JD_SEPARATOR_RE.split(text or "") if part.strip()]
+
+def _default_title(description: str) -> str:
+    first_line = description.strip().splitlines()[0].strip()
+    return first_line if len(first_line) <= 60 else first_line[:57] + "..."
+
+def load_job_descriptions(name: str, content: str) -> List[Tuple[str, str]]:
+    """
+    Read job descriptions from one uploaded file or paste.
+
+    `.jsonl` files hold one posting per line, either a string or an object
+    with a description field (and optionally a title); anything else is
+    treated as plain text, possibly holding several descriptions separated
+    by "---" lines.
+
+    Args:
+        name (str): File name, used for the format and as a title fallback
+        content (str): File contents
+
+    Returns:
+        list: (title, description) pairs
+
+    Raises:
+        JobFitError: If a JSONL line is not valid JSON or has no description
+    """
+    if not name.lower().endswith(".jsonl"):
+        return [(_default_title(description), description) for description in split_job_descriptions(content)]
+
+    jobs = []
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise JobFitError(f"{name} line {line_number}: invalid JSON ({e.msg})")
+        if isinstance(record, dict):
+            description = next((record[field] for field in JSONL_DESCRIPTION_FIELDS if isinstance(record.get(field), str)), "")
+            title = next((str(record[field]) for field in JSONL_TITLE_FIELDS if record.get(field)), "")
+        else:
+            description, title = str(record), ""
+        if not description.strip():
+            raise JobFitError(f"{name} line {line_number}: no job description field found")
+        jobs.append((title or _default_title(description), description.strip()))
+    return jobs
+
+def batch_job_fit(resume_text: str, jobs: List[Tuple[str, str]],
+                  max_workers: int = MAX_FIT_WORKERS, threshold: Optional[float] = None,
+                  api_key: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Analyze one resume against many job descriptions in parallel.
+
+    Requests run on a bounded pool and go through the LLM gateway, which
+    applies the per-model rate limit and caches each analysis, so rerunning
+    a batch only calls the model for new or changed descriptions. Duplicate
+    descriptions are analyzed once.
+
+    Each pair is first scored locally with lexical_fit; descriptions below
+    the threshold are reported as skipped without calling the model.
+
+    Args:
+        resume_text (str): The text of the user's resume
+        jobs (list): (title, description) pairs
+        max_workers (int): Maximum concurrent analyses
+        threshold (float): Minimum lexical score (%) for an LLM analysis;
+            defaults to LEXICAL_FIT_THRESHOLD, 0 analyzes everything
+        api_key (str): Gemini API key, e.g. the session's; None uses the gateway's default
+
+    Yields:
+        dict: {"title", "description", "lexical_score", "skipped", "fit_score",
+        "analysis", "error"} per unique description, skipped ones first, the
+        rest in completion order
+    """
+    unique_jobs = {}
+    for title, description in jobs:
+        unique_jobs.setdefault(description, title)
+    screened = []
+    for description, title in unique_jobs.items():
+        result = {"title": title, "description": description, "lexical_score": None, "skipped": False,
+                  "fit_score": None, "analysis": None, "error": None}
+        prescreen = lexical_fit(resume_text, description)
+        result["lexical_score"] = prescreen.score
+        if passes_prescreen(prescreen, threshold):
+            screened.append(result)
+        else:
+            result["skipped"] = True
+            yield result
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="skillwise-fit") as executor:
+        futures = {executor.submit(analyze_job_fit, resume_text, result["description"], api_key): result
+                   for result in screened}
+        for future in as_completed(futures):
+            result = futures[future]
+            try:
+                result["analysis"] = future.result()
+                result["fit_score"] = parse_fit_score(result["analysis"])
+            except Exception as e:
+                result["error"] = str(e)
+            yield result
+
+def rank_fit_results(results: List[Dict]) -> List[Dict]:
+    """Order batch results by fit score, highest first; unscored, failed and skipped jobs go last by lexical score."""
+    return sorted(results, key=lambda r: (r["fit_score"] is None, -(r["fit_score"] or 0), -(r.get("lexical_score") or 0)))
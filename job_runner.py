@@ -0,0 +1,169 @@
+# job_runner.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+MAX_JOB_WORKERS = int(os.getenv("SKILLWISE_JOB_WORKERS", "4"))
+JOB_RETENTION = 60 * 60  # Seconds a finished job stays available for polling
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    """Raised inside a job function once cancellation has been requested."""
+    pass
+
+class Job:
+    """
+    State of one background job, shared between its worker thread and pollers.
+
+    Job functions receive the Job as their first argument. They can publish
+    partial text with `append_text` and should call `check_cancelled` at
+    convenient points; `cancel_event` can be handed to code that waits.
+    """
+
+    def __init__(self, job_id: str, kind: str):
+        self.id = job_id
+        self.kind = kind
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._parts = []
+        self._lock = threading.Lock()
+        self._future = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def partial_text(self) -> str:
+        with self._lock:
+            return "".join(self._parts)
+
+    def append_text(self, text: str) -> None:
+        with self._lock:
+            self._parts.append(text)
+
+    def _finish(self, status: str) -> None:
+        """Move the job to a finished state; finished_at is set first so a done job always has it."""
+        with self._lock:
+            self.finished_at = time.time()
+            self.status = status
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def snapshot(self) -> Dict:
+        """Return a consistent copy of the job's public state."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "partial_text": self.partial_text,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobRunner:
+    """
+    Runs long tasks such as roadmap generation on a shared thread pool.
+
+    Jobs are identified by short string IDs so callers (e.g. Streamlit
+    sessions across reruns) can poll their status, read streamed partial
+    output, and request cancellation. Finished jobs are kept for
+    `retention` seconds.
+    """
+
+    def __init__(self, max_workers: int = MAX_JOB_WORKERS, retention: float = JOB_RETENTION):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="skillwise-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, kind: str = "job", **kwargs) -> str:
+        """
+        Schedule `fn(job, *args, **kwargs)` and return the new job's ID.
+
+        The function's return value becomes `job.result`; an exception marks
+        the job failed with its message in `job.error`.
+        """
+        self._prune()
+        job = Job(uuid.uuid4().hex[:12], kind)
+        with self._lock:
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job: Job, fn: Callable, args, kwargs) -> None:
+        if job.cancel_event.is_set():
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        status = FAILED
+        try:
+            job.result = fn(job, *args, **kwargs)
+            status = CANCELLED if job.cancel_event.is_set() else SUCCEEDED
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            # Code that watches cancel_event may surface cancellation as its own error
+            status = CANCELLED if job.cancel_event.is_set() else FAILED
+        finally:
+            job._finish(status)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of the job, or None if it is unknown or expired."""
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation. Queued jobs never start; running jobs stop at
+        their next cancellation check.
+
+        Returns:
+            bool: False if the job is unknown or already finished
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_event.set()
+        if job._future is not None and job._future.cancel():
+            job._finish(CANCELLED)
+        return True
+
+    def active_jobs(self, kind: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.done and (kind is None or job.kind == kind)]
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at is not None and job.done and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+_runner = JobRunner()
+
+def get_job_runner() -> JobRunner:
+    """Return the process-wide runner shared by all sessions."""
+    return _runner
@@ -0,0 +1,184 @@
+# lexical_fit.py
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from skill_matcher import load_skills_data
+
+# Minimum share (%) of a job description's term weight the resume must cover
+# before the LLM fit analysis and focused roadmap are worth running. Calibrated
+# on sample resume/JD pairs: same or adjacent field scored 20-70, unrelated
+# fields (e.g. a developer against a nursing or sales posting) under 7.
+LEXICAL_FIT_THRESHOLD = float(os.getenv("SKILLWISE_LEXICAL_FIT_THRESHOLD", "10"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+# IDF of terms outside the reference corpus. They are mostly generic prose
+# (company blurbs, benefits, legal text) that says little about fit, so they
+# weigh less than any taxonomy term instead of the most.
+OUT_OF_VOCABULARY_IDF = 0.3
+VECTOR_CACHE_SIZE = 256
+MAX_VOCABULARY = 20000  # Reference terms kept, most frequent first
+TOP_TERMS = 15
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# English function words plus words every job posting or resume uses
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each etc few for from further had has have having he her here
+hers him his how i if in into is it its itself just me more most my no nor not now of off on once only or other
+our ours out over own per same she should so some such than that the their them then there these they this
+those through to too under until up very via was we were what when where which while who whom why will with
+within without would you your yours
+ability able across candidate candidates company experience experienced familiarity good great help ideal
+including job join knowledge looking must need needs new plus preferred required requirements
+responsibilities role seeking skills strong team teams understanding using work working year years
+""".split())
+
+@dataclass(frozen=True)
+class LexicalFit:
+    score: float                    # % of the JD's term weight found in the resume
+    similarity: float               # Cosine similarity of the two weighted term vectors (0-1)
+    overlapping: Tuple[str, ...]    # Most important JD terms the resume contains
+    missing: Tuple[str, ...]        # Most important JD terms the resume lacks
+
+def tokenize(text: str) -> list:
+    """Lowercase terms, keeping tech spellings like "c++", "c#" and "node.js"."""
+    tokens = (token.rstrip(".") for token in _TOKEN_RE.findall((text or "").lower()))
+    return [token for token in tokens if len(token) > 1 and token not in STOP_WORDS and not token.isdigit()]
+
+def taxonomy_documents(skills_data: Dict) -> List[str]:
+    """
+    Reference documents built from the bundled skills taxonomy, one per role.
+
+    Each holds the role's name, its required skills with all their aliases
+    and the recommended courses, so skills many roles share weigh less than
+    role-specific ones.
+    """
+    expanded = skills_data.get("expanded_skill_terms", {})
+    courses = skills_data.get("course_recommendations", {})
+    roles = dict(skills_data.get("required_skills", {}))
+    roles.setdefault("", skills_data.get("default_skills", []))
+    documents = []
+    for role, skills in roles.items():
+        parts = [role]
+        for skill in skills:
+            parts.extend(expanded.get(skill, [skill]))
+            parts.append(courses.get(skill, ""))
+        documents.append(" ".join(parts))
+    return documents
+
+class LexicalFitModel:
+    """
+    Local BM25-weighted TF-IDF model comparing resumes with job descriptions.
+
+    Document frequencies come from a fixed reference corpus (by default the
+    skills taxonomy) and never from the texts being scored, so a pair gets
+    the same score whatever the process has seen before. Terms missing from
+    the corpus get a low fixed weight, so skills dominate the score. Term
+    counts are cached per text, so re-screening the same resume against
+    many JDs tokenizes it only once. Vectors are sparse dicts of term -> weight.
+    """
+
+    def __init__(self, reference_documents: Iterable[str], k1: float = BM25_K1, b: float = BM25_B,
+                 cache_size: int = VECTOR_CACHE_SIZE, max_vocabulary: int = MAX_VOCABULARY,
+                 out_of_vocabulary_idf: float = OUT_OF_VOCABULARY_IDF):
+        self.k1 = k1
+        self.b = b
+        self.out_of_vocabulary_idf = out_of_vocabulary_idf
+        self.cache_size = cache_size
+        document_frequency = Counter()
+        self._documents = 0
+        for text in reference_documents:
+            document_frequency.update(set(tokenize(text)))
+            self._documents += 1
+        self._document_frequency = dict(document_frequency.most_common(max_vocabulary))
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _term_counts(self, text: str) -> Counter:
+        digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+        with self._lock:
+            counts = self._counts.get(digest)
+            if counts is not None:
+                self._counts.move_to_end(digest)
+                return counts
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._counts[digest] = counts
+            while len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return counts
+
+    def idf(self, term: str) -> float:
+        """BM25 IDF of `term` in the reference corpus; terms it lacks get `out_of_vocabulary_idf`."""
+        frequency = self._document_frequency.get(term)
+        if frequency is None:
+            return self.out_of_vocabulary_idf
+        return math.log(1 + (self._documents - frequency + 0.5) / (frequency + 0.5))
+
+    def vector(self, text: str, average_length: Optional[float] = None) -> Dict[str, float]:
+        """
+        Sparse term -> BM25 tf x idf weight vector for `text`.
+
+        `average_length` is the document length BM25 normalizes against;
+        it defaults to the text's own length (no length penalty).
+        """
+        counts = self._term_counts(text)
+        length = sum(counts.values())
+        norm = self.k1 * (1 - self.b + self.b * length / (average_length or length or 1))
+        return {term: self.idf(term) * tf * (self.k1 + 1) / (tf + norm) for term, tf in counts.items()}
+
+    def fit(self, resume_text: str, job_description: str, top_terms: int = TOP_TERMS) -> LexicalFit:
+        """
+        Compare a resume with a job description.
+
+        Args:
+            resume_text (str): The text of the user's resume
+            job_description (str): The job description text
+            top_terms (int): How many overlapping/missing terms to report
+
+        Returns:
+            LexicalFit: Coverage score, cosine similarity and the key shared and missing terms
+        """
+        # Lengths are normalized within the pair, which keeps the score independent of other texts
+        average_length = (sum(self._term_counts(resume_text).values()) + sum(self._term_counts(job_description).values())) / 2
+        resume_vector = self.vector(resume_text, average_length)
+        job_vector = self.vector(job_description, average_length)
+        total_weight = sum(job_vector.values())
+        if not total_weight or not resume_vector:
+            return LexicalFit(0.0, 0.0, (), tuple(sorted(job_vector, key=job_vector.get, reverse=True)[:top_terms]))
+
+        covered = sum(weight for term, weight in job_vector.items() if term in resume_vector)
+        dot = sum(weight * resume_vector[term] for term, weight in job_vector.items() if term in resume_vector)
+        magnitude = math.sqrt(sum(w * w for w in job_vector.values())) * math.sqrt(sum(w * w for w in resume_vector.values()))
+        ranked_terms = sorted(job_vector, key=job_vector.get, reverse=True)
+        return LexicalFit(
+            score=covered / total_weight * 100,
+            similarity=dot / magnitude if magnitude else 0.0,
+            overlapping=tuple(term for term in ranked_terms if term in resume_vector)[:top_terms],
+            missing=tuple(term for term in ranked_terms if term not in resume_vector)[:top_terms],
+        )
+
+def passes_prescreen(fit: LexicalFit, threshold: Optional[float] = None) -> bool:
+    """True if the lexical fit is high enough to spend LLM calls on the pair."""
+    return fit.score >= (LEXICAL_FIT_THRESHOLD if threshold is None else threshold)
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_lexical_model() -> LexicalFitModel:
+    """Return the process-wide model over the bundled taxonomy, built on first use."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = LexicalFitModel(taxonomy_documents(load_skills_data()))
+        return _model
+
+def lexical_fit(resume_text: str, job_description: str) -> LexicalFit:
+    """Score a resume against a job description with the shared model."""
+    return get_lexical_model().fit(resume_text, job_description)
@@ -0,0 +1,269 @@
+# llm_gateway.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from disk_cache import DiskCache, CACHE_DIR, make_key
+
+# Models used across the app, kept in one place so call sites never hard-code them
+GOAL_MODEL = "gemini-2.0-flash"
+ROADMAP_MODEL = "gemini-2.5-flash-lite"
+GAP_ANALYSIS_MODEL = "gemini-2.5-flash-lite"
+JOB_FIT_MODEL = "gemini-2.0-flash"
+QA_MODEL = "gemini-1.5-flash"
+SUMMARY_MODEL = "gemini-2.0-flash"
+
+MAX_CONCURRENCY_PER_MODEL = int(os.getenv("SKILLWISE_LLM_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = float(os.getenv("SKILLWISE_LLM_RPM", "60"))
+RATE_LIMIT_TIMEOUT = 60.0  # Seconds to wait for a rate-limit token before giving up
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # One day; the usual cache_ttl for analysis calls
+RESPONSE_CACHE_MAX_TTL = 7 * 24 * 60 * 60  # Longest cache_ttl any caller uses; older entries are evicted
+MAX_API_KEYS = 32  # Key-scoped clients kept at once; the least recently used is dropped beyond this
+
+class LLMGatewayError(Exception):
+    """Custom exception for LLM gateway errors."""
+    pass
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available. Returns False if `timeout` expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class LLMGateway:
+    """
+    Single entry point for every Gemini call made by SkillWise.
+
+    Configured model objects are reused (each keeps its own client connection),
+    every model gets a concurrency semaphore and a token-bucket rate limiter.
+    Callers opt in to the shared on-disk response cache per call with
+    `cache_ttl`; identical in-flight cached requests are coalesced into one
+    call. Generative and interactive calls leave it unset and always reach
+    the model.
+
+    Each call runs with the API key passed to it, through clients scoped to
+    that key, so Streamlit sessions sharing the process never use each
+    other's key. The key set with `configure` is only a default for callers
+    that pass none, such as the batch CLI.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY_PER_MODEL,
+                 requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 cache: Optional[DiskCache] = None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.cache = cache
+        self._api_key = None  # Default key for calls that pass none
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()  # api_key -> client manager scoped to that key
+        self._models = {}  # (api_key, model_name) -> GenerativeModel
+        self._semaphores = {}
+        self._buckets = {}
+        self._inflight = {}
+
+    @property
+    def is_configured(self) -> bool:
+        """True if a default key is set for calls that pass none."""
+        return bool(self._api_key)
+
+    def has_key(self, api_key: Optional[str] = None) -> bool:
+        """True if a call made with `api_key` (None for the default) would have a key to use."""
+        return bool(self._api_key if api_key is None else api_key)
+
+    def configure(self, api_key: str) -> None:
+        """Set the default API key, used by calls that do not pass their own."""
+        if api_key:
+            self._api_key = api_key
+
+    def _resolve_key(self, api_key: Optional[str]) -> str:
+        key = self._api_key if api_key is None else api_key
+        if not key:
+            raise LLMGatewayError("Gemini API key not configured. Please enter it in the sidebar.")
+        return key
+
+    def _client_manager(self, api_key: str):
+        """Client manager scoped to `api_key`; genai.configure() would switch the key for the whole process."""
+        with self._lock:
+            manager = self._clients.get(api_key)
+            if manager is not None:
+                self._clients.move_to_end(api_key)
+                return manager
+            manager = genai_client._ClientManager()
+            manager.configure(api_key=api_key)
+            self._clients[api_key] = manager
+            if len(self._clients) > MAX_API_KEYS:
+                dropped, _ = self._clients.popitem(last=False)
+                for key in [key for key in self._models if key[0] == dropped]:
+                    del self._models[key]
+            return manager
+
+    def get_model(self, model_name: str, api_key: Optional[str] = None):
+        """Return a reusable GenerativeModel for `model_name` bound to `api_key`."""
+        key = self._resolve_key(api_key)
+        manager = self._client_manager(key)
+        with self._lock:
+            model = self._models.get((key, model_name))
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                model._client = manager.get_default_client("generative")  # Instead of the process-wide default client
+                self._models[(key, model_name)] = model
+            return model
+
+    def _limits(self, model_name: str):
+        with self._lock:
+            if model_name not in self._semaphores:
+                self._semaphores[model_name] = threading.BoundedSemaphore(self.max_concurrency)
+                rate = self.requests_per_minute / 60.0
+                self._buckets[model_name] = TokenBucket(rate, capacity=max(1.0, float(self.max_concurrency)))
+            return self._semaphores[model_name], self._buckets[model_name]
+
+    def _call(self, prompt: str, model_name: str, api_key: str) -> str:
+        semaphore, bucket = self._limits(model_name)
+        with semaphore:
+            if not bucket.acquire(timeout=RATE_LIMIT_TIMEOUT):
+                raise LLMGatewayError(f"Rate limit exceeded for {model_name}. Please try again shortly.")
+            response = self.get_model(model_name, api_key).generate_content(prompt)
+        if not response or not response.text:
+            raise LLMGatewayError("Empty response from model")
+        return response.text.strip()
+
+    def generate(self, prompt: str, model: str = ROADMAP_MODEL, cache_ttl: Optional[float] = None,
+                 cache_key: Optional[str] = None, api_key: Optional[str] = None) -> str:
+        """
+        Generate text for `prompt` with the given model.
+
+        Args:
+            prompt (str): The prompt to send
+            model (str): Model name, one of the *_MODEL constants
+            cache_ttl (float): Serve and store the response in the shared cache,
+                accepting cached responses up to this many seconds old; None
+                (the default) always calls the model
+            cache_key (str): Override the default (model, prompt) cache key
+            api_key (str): Gemini API key for this call, e.g. the session's;
+                None uses the default key set with configure()
+
+        Returns:
+            str: The stripped response text
+
+        Raises:
+            LLMGatewayError: If there is no API key or the call is rate limited
+        """
+        api_key = self._resolve_key(api_key)  # Cached responses are only for callers with a key too
+        if cache_ttl is None or self.cache is None:
+            return self._call(prompt, model, api_key)
+
+        key = cache_key or make_key(model, prompt)
+        cached = self.cache.get(key, max_age=cache_ttl)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+        if not is_leader:
+            return future.result()  # Coalesce onto the identical request already in flight
+
+        try:
+            text = self._call(prompt, model, api_key)
+            self.cache.set(key, text)
+            future.set_result(text)
+            return text
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stream(self, prompt: str, model: str = ROADMAP_MODEL, cache_ttl: Optional[float] = None,
+               api_key: Optional[str] = None):
+        """
+        Yield response text chunks for `prompt` as the model produces them.
+
+        The concurrency slot is held until the stream is exhausted or closed.
+        With `cache_ttl` set, a complete response is stored in the shared
+        cache and a cached response is yielded as a single chunk. `api_key`
+        is used as in generate().
+        """
+        api_key = self._resolve_key(api_key)
+        key = make_key(model, prompt)
+        use_cache = cache_ttl is not None and self.cache is not None
+        if use_cache:
+            cached = self.cache.get(key, max_age=cache_ttl)
+            if cached is not None:
+                yield cached
+                return
+
+        semaphore, bucket = self._limits(model)
+        with semaphore:
+            if not bucket.acquire(timeout=RATE_LIMIT_TIMEOUT):
+                raise LLMGatewayError(f"Rate limit exceeded for {model}. Please try again shortly.")
+            response = self.get_model(model, api_key).generate_content(prompt, stream=True)
+            parts = []
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue  # Chunks without text parts (e.g. safety metadata)
+                if text:
+                    parts.append(text)
+                    yield text
+        full_text = "".join(parts).strip()
+        if not full_text:
+            raise LLMGatewayError("Empty response from model")
+        if use_cache:
+            self.cache.set(key, full_text)
+
+    def list_models(self, api_key: Optional[str] = None):
+        """Return the names of models that support content generation."""
+        client = self._client_manager(self._resolve_key(api_key)).get_default_client("model")
+        return [m.name for m in genai.list_models(client=client) if "generateContent" in m.supported_generation_methods]
+
+_gateway = LLMGateway(
+    cache=DiskCache(os.path.join(CACHE_DIR, "llm_responses.sqlite3"), ttl=RESPONSE_CACHE_MAX_TTL,
+                    max_entries=5000, max_bytes=50 * 1024 * 1024)
+)
+_gateway.configure(os.getenv("GEMINI_API_KEY", ""))
+
+def get_gateway() -> LLMGateway:
+    """Return the process-wide gateway shared by all sessions."""
+    return _gateway
+
+def configure(api_key: str) -> None:
+    _gateway.configure(api_key)
+
+def generate(prompt: str, model: str = ROADMAP_MODEL, cache_ttl: Optional[float] = None,
+             cache_key: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    return _gateway.generate(prompt, model=model, cache_ttl=cache_ttl, cache_key=cache_key, api_key=api_key)
+
+def stream(prompt: str, model: str = ROADMAP_MODEL, cache_ttl: Optional[float] = None,
+           api_key: Optional[str] = None):
+    return _gateway.stream(prompt, model=model, cache_ttl=cache_ttl, api_key=api_key)
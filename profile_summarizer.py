@@ -0,0 +1,148 @@
+# profile_summarizer.py
+import hashlib
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import llm_gateway
+from disk_cache import make_key
+from llm_gateway import RESPONSE_CACHE_TTL, SUMMARY_MODEL
+
+SUMMARY_WORKERS = int(os.getenv("SKILLWISE_SUMMARY_WORKERS", "0")) or llm_gateway.MAX_CONCURRENCY_PER_MODEL
+SUMMARY_CACHE_VERSION = 2  # Bump when the summary prompts change so stale summaries are ignored
+PROFILE_SUMMARY_CHARS = 2500  # Default length of the final profile when no budget is given
+CHUNK_CHARS = 6000
+MAX_CHUNKS = 8  # Larger profiles get larger chunks, so latency stays at one map round and one reduce
+REDUCE_INPUT_CHARS = 8000  # Total length of the partial summaries fed to the reduce step
+MIN_PARTIAL_SUMMARY_CHARS = 400
+
+class ProfileSummaryError(Exception):
+    """Custom exception for profile summarization errors."""
+    pass
+
+def _pack_lines(lines: List[str], size: int) -> List[str]:
+    chunks, current = [], ""
+    for line in lines:
+        while len(line) > size:
+            if current.strip():
+                chunks.append(current.strip())
+            current = ""
+            chunks.append(line[:size])
+            line = line[size:]
+        at_entry_boundary = not line.strip() and len(current) >= size * 0.8
+        if at_entry_boundary or len(current) + len(line) + 1 > size:
+            if current.strip():
+                chunks.append(current.strip())
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+def chunk_text(text: str, max_chunks: int = MAX_CHUNKS, chunk_chars: int = CHUNK_CHARS) -> List[str]:
+    """
+    Split text into at most `max_chunks` pieces at line boundaries.
+
+    Blank lines are preferred as split points so an experience entry stays
+    in one piece; a single line longer than the chunk size is cut. Long
+    texts get proportionally larger chunks rather than more of them.
+    """
+    lines = (text or "").strip().splitlines()
+    size = max(chunk_chars, math.ceil(len("\n".join(lines)) / max_chunks))
+    chunks = _pack_lines(lines, size)
+    while len(chunks) > max_chunks:
+        size = math.ceil(size * 1.1)
+        chunks = _pack_lines(lines, size)
+    return chunks
+
+def _trim(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip()
+
+def summarize_chunk(chunk: str, max_chars: int, position: str = "", api_key: Optional[str] = None) -> str:
+    """
+    Summarize one part of a profile, caching the result by the chunk's content hash.
+
+    The summary does not depend on the target role, so the same resume is
+    summarized once for every prompt built from it and then served from
+    the gateway's cache.
+    """
+    prompt = (
+        f"Below is {position or 'part of'} a candidate's resume or LinkedIn profile.\n"
+        "Condense it into a factual profile summary. Keep job titles, employers, dates, "
+        "technologies, skills, certifications, education and quantified achievements. "
+        "Drop boilerplate, repetition and generic phrases. Use short bullet points and "
+        "do not invent anything that is not in the text.\n"
+        f"Use at most {max_chars} characters.\n\n"
+        f"---\n{chunk}\n---"
+    )
+    digest = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+    cache_key = make_key("profile_chunk", SUMMARY_CACHE_VERSION, SUMMARY_MODEL, max_chars, digest)
+    return _trim(llm_gateway.generate(prompt, model=SUMMARY_MODEL, cache_ttl=RESPONSE_CACHE_TTL,
+                                      cache_key=cache_key, api_key=api_key), max_chars)
+
+def summarize_profile(profile_text: str, max_chars: int = PROFILE_SUMMARY_CHARS,
+                      max_workers: int = SUMMARY_WORKERS, api_key: Optional[str] = None) -> str:
+    """
+    Condense an oversized resume or LinkedIn export into one compact profile.
+
+    The text is split into chunks that are summarized concurrently (map),
+    then the partial summaries are merged into a single profile (reduce)
+    unless together they already fit. Text already within `max_chars` is
+    returned unchanged. Every step is cached by the hash of the text it
+    summarizes, so a resume is condensed once per length limit.
+
+    Args:
+        profile_text (str): Resume text or parse_linkedin_json output
+        max_chars (int): Length limit for the profile, e.g. the space left in a prompt
+        max_workers (int): Concurrent chunk summaries
+        api_key (str): Gemini API key, e.g. the session's; None uses the gateway's default
+
+    Returns:
+        str: The compact profile
+
+    Raises:
+        ProfileSummaryError: If there is no API key or a summary call fails
+    """
+    profile_text = (profile_text or "").strip()
+    if len(profile_text) <= max_chars:
+        return profile_text
+    if not llm_gateway.get_gateway().has_key(api_key):
+        raise ProfileSummaryError("Gemini API key not configured.")
+
+    chunks = chunk_text(profile_text)
+    try:
+        if len(chunks) == 1:
+            return summarize_chunk(chunks[0], max_chars, position="a", api_key=api_key)
+
+        partial_chars = max(MIN_PARTIAL_SUMMARY_CHARS, REDUCE_INPUT_CHARS // len(chunks))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))),
+                                thread_name_prefix="skillwise-summary") as executor:
+            futures = [
+                executor.submit(summarize_chunk, chunk, partial_chars, f"part {i} of {len(chunks)} of", api_key)
+                for i, chunk in enumerate(chunks, 1)
+            ]
+            partials = [future.result() for future in futures]  # Kept in profile order
+        combined = "\n\n".join(partials)
+        if len(combined) <= max_chars:
+            return combined
+
+        prompt = (
+            "Below are summaries of consecutive parts of one candidate's resume or LinkedIn profile.\n"
+            "Merge them into a single profile with these sections: Summary, Experience (most recent first), "
+            "Skills, Education and Certifications, Notable Projects and Achievements. "
+            "Remove duplicates, keep dates, employers and technologies, and do not invent anything.\n"
+            f"Use at most {max_chars} characters.\n\n"
+            + "\n\n".join(f"Part {i}:\n{partial}" for i, partial in enumerate(partials, 1))
+        )
+        digest = hashlib.sha256(profile_text.encode("utf-8")).hexdigest()
+        cache_key = make_key("profile", SUMMARY_CACHE_VERSION, SUMMARY_MODEL, max_chars, digest)
+        return _trim(llm_gateway.generate(prompt, model=SUMMARY_MODEL, cache_ttl=RESPONSE_CACHE_TTL,
+                                          cache_key=cache_key, api_key=api_key), max_chars)
+    except llm_gateway.LLMGatewayError as e:
+        raise ProfileSummaryError(str(e))
+    except Exception as e:
+        raise ProfileSummaryError(f"Failed to summarize profile: {str(e)}")
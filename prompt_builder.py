@@ -0,0 +1,328 @@
+# prompt_builder.py
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from lexical_fit import tokenize
+from llm_gateway import GAP_ANALYSIS_MODEL, JOB_FIT_MODEL, QA_MODEL, ROADMAP_MODEL, SUMMARY_MODEL
+from profile_summarizer import ProfileSummaryError, summarize_profile
+from skill_matcher import get_skill_matcher
+
+CHARS_PER_TOKEN = 4  # Rough average for English text with Gemini's tokenizer
+
+# Prompt purposes; budgets are keyed by these rather than by model, since several share a model
+ROADMAP_PROMPT = "roadmap"
+FOCUSED_ROADMAP_PROMPT = "focused_roadmap"
+GAP_ANALYSIS_PROMPT = "gap_analysis"
+JOB_FIT_PROMPT = "job_fit"
+
+PROMPT_MODELS = {
+    ROADMAP_PROMPT: ROADMAP_MODEL,
+    FOCUSED_ROADMAP_PROMPT: ROADMAP_MODEL,
+    GAP_ANALYSIS_PROMPT: GAP_ANALYSIS_MODEL,
+    JOB_FIT_PROMPT: JOB_FIT_MODEL,
+}
+
+# Input token limit of each model's context window
+MODEL_INPUT_TOKEN_LIMITS = {
+    ROADMAP_MODEL: 1048576,
+    GAP_ANALYSIS_MODEL: 1048576,
+    JOB_FIT_MODEL: 1048576,
+    QA_MODEL: 1048576,
+    SUMMARY_MODEL: 1048576,
+}
+DEFAULT_INPUT_TOKEN_LIMIT = 32768
+
+# Input token budget for a whole prompt of each purpose. Far below the context
+# windows, to bound cost and latency per call, but enough that a full resume
+# (and job description) is sent as is; only long profiles get condensed.
+PROMPT_TOKEN_BUDGETS = {
+    ROADMAP_PROMPT: 8000,
+    FOCUSED_ROADMAP_PROMPT: 12000,
+    GAP_ANALYSIS_PROMPT: 8000,
+    JOB_FIT_PROMPT: 12000,
+}
+DEFAULT_TOKEN_BUDGET = 8000
+MIN_PARTIAL_SECTION_CHARS = 200  # Don't bother including a sliver of a section
+SUMMARY_LENGTH_STEP = 250  # Summary limits are rounded down to this, so similar prompts share a cached summary
+
+HEADER_SECTION = "Header"  # Text before the first heading: name, contact, headline
+
+# Job description section kinds and their base priority when compacting one
+JOB_SECTION_PRIORITIES = {
+    "requirements": 3, "qualifications": 3, "minimum qualifications": 3, "basic qualifications": 3,
+    "required skills": 3, "must have": 3, "what you'll need": 3, "what we're looking for": 3,
+    "preferred qualifications": 2, "nice to have": 2, "bonus points": 1,
+    "responsibilities": 2, "key responsibilities": 2, "what you'll do": 2, "the role": 2, "role": 2,
+    "about you": 2, "about the role": 1, "about the job": 1,
+    "about us": -1, "about the company": -1, "who we are": -1, "our culture": -1,
+    "benefits": -2, "perks": -2, "what we offer": -2, "compensation": -1, "salary": -1,
+    "equal opportunity": -2, "equal opportunity employer": -2, "how to apply": -2,
+}
+
+# Section kinds and their base priority when ranking
+SECTION_PRIORITIES = {
+    "summary": 2, "profile": 2, "objective": 1, "about": 2, "headline": 2,
+    "experience": 3, "work experience": 3, "professional experience": 3, "employment history": 3, "employment": 3,
+    "skills": 3, "technical skills": 3, "core competencies": 3,
+    "projects": 3, "personal projects": 3,
+    "education": 1, "certifications": 1, "courses": 1, "training": 1,
+    "awards": 0, "achievements": 0, "publications": 0, "leadership": 0, "activities": 0, "volunteer": 0,
+    "volunteering": 0, "languages": 0, "interests": -1, "hobbies": -1, "references": -2,
+}
+
+_MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s+(.+)$")
+_BOILERPLATE_RE = re.compile(
+    r"^(?:page \d+(?: of \d+)?|\d+ of \d+|references available(?: upon| on)? request\.?|curriculum vitae|resume|cv)$",
+    re.IGNORECASE,
+)
+
+@dataclass(frozen=True)
+class ResumeSection:
+    title: str
+    lines: tuple
+    position: int            # Order in the original resume
+
+    @property
+    def text(self) -> str:
+        body = "\n".join(self.lines)
+        return body if self.title == HEADER_SECTION else f"{self.title}\n{body}"
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text`."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+def token_budget(purpose: str) -> int:
+    """Input token budget for a whole prompt of `purpose`, within its model's context window."""
+    limit = MODEL_INPUT_TOKEN_LIMITS.get(PROMPT_MODELS.get(purpose), DEFAULT_INPUT_TOKEN_LIMIT)
+    return min(PROMPT_TOKEN_BUDGETS.get(purpose, DEFAULT_TOKEN_BUDGET), limit)
+
+def char_budget(purpose: str) -> int:
+    return token_budget(purpose) * CHARS_PER_TOKEN
+
+def _heading(line: str) -> Optional[str]:
+    markdown = _MARKDOWN_HEADING_RE.match(line)
+    if markdown:
+        return markdown.group(1).strip()
+    candidate = line.rstrip(":").strip()
+    if not candidate or len(candidate) > 40:
+        return None
+    if candidate.lower() in SECTION_PRIORITIES or candidate.lower() in JOB_SECTION_PRIORITIES:
+        return candidate
+    words = candidate.split()
+    if candidate.isupper() and len(words) <= 4 and any(c.isalpha() for c in candidate):
+        return candidate
+    return None
+
+def segment_resume(resume_text: str) -> List[ResumeSection]:
+    """
+    Split a resume into headed sections, dropping boilerplate and repeated lines.
+
+    Page numbers, "references available upon request" and the like are
+    removed, as are lines repeated verbatim (e.g. page headers of a
+    multi-page PDF). Text before the first heading becomes HEADER_SECTION.
+    """
+    sections = []
+    title, lines = HEADER_SECTION, []
+    seen = set()
+    for raw_line in (resume_text or "").splitlines():
+        line = " ".join(raw_line.split())
+        if not line or _BOILERPLATE_RE.match(line):
+            continue
+        heading = _heading(line)
+        if heading:
+            if lines:
+                sections.append(ResumeSection(title, tuple(lines), len(sections)))
+            title, lines = heading, []
+            continue
+        key = line.lower()
+        if key in seen and len(line) > 3:
+            continue
+        seen.add(key)
+        lines.append(line)
+    if lines:
+        sections.append(ResumeSection(title, tuple(lines), len(sections)))
+    return sections
+
+def _relevance(section: ResumeSection, role_skills: set, focus_terms: set) -> float:
+    if section.title == HEADER_SECTION:
+        return math.inf  # Who the candidate is always comes first
+    matcher = get_skill_matcher()
+    skill_hits = len({match.skill for match in matcher.find(section.text) if match.skill in role_skills})
+    term_hits = len(focus_terms.intersection(tokenize(section.text)))
+    return SECTION_PRIORITIES.get(section.title.lower(), 1) + 2 * skill_hits + term_hits
+
+def rank_sections(sections: List[ResumeSection], role: str = "", goal: str = "", context: str = "") -> List[ResumeSection]:
+    """
+    Order sections by relevance to the target role, most relevant first.
+
+    Relevance combines the kind of section (experience and skills over
+    hobbies), the role's taxonomy skills it mentions, and its overlap with
+    the goal, role and any extra context such as a job description.
+    """
+    role_skills = set(get_skill_matcher().skills_for_role(role)) if role else set()
+    focus_terms = set(tokenize(" ".join((role, goal, context))))
+    scores = {section.position: _relevance(section, role_skills, focus_terms) for section in sections}
+    return sorted(sections, key=lambda section: (-scores[section.position], section.position))
+
+def compact_resume(resume_text: str, max_chars: int, role: str = "", goal: str = "", context: str = "") -> str:
+    """
+    Fit a resume into `max_chars`, keeping the sections most relevant to the role.
+
+    The resume is cleaned (see segment_resume) and, if still too long, its
+    sections are packed by relevance; kept sections stay in their original
+    order and the last one that only partly fits is cut at a line boundary.
+    Omitted sections are listed so the model doesn't read them as missing.
+
+    Args:
+        resume_text (str): The text of the user's resume
+        max_chars (int): Character budget for the result
+        role (str): Target role, used to rank sections
+        goal (str): Career goal, used to rank sections
+        context (str): Extra text to rank against, e.g. a job description
+
+    Returns:
+        str: The compacted resume
+    """
+    sections = segment_resume(resume_text)
+    cleaned = "\n\n".join(section.text for section in sections)
+    if len(cleaned) <= max_chars:
+        return cleaned
+
+    kept, omitted = {}, []
+    remaining = max_chars - 60  # Room for the omitted-sections note
+    for section in rank_sections(sections, role, goal, context):
+        text = section.text
+        if len(text) + 2 <= remaining:
+            kept[section.position] = text
+            remaining -= len(text) + 2
+        elif remaining >= MIN_PARTIAL_SECTION_CHARS:
+            partial = []
+            for line in text.splitlines():
+                if len(line) + 1 > remaining:
+                    break
+                partial.append(line)
+                remaining -= len(line) + 1
+            if len(partial) > 1 or section.title == HEADER_SECTION:
+                kept[section.position] = "\n".join(partial)
+            else:
+                omitted.append(section.title)
+            remaining -= 2
+        else:
+            omitted.append(section.title)
+
+    compacted = "\n\n".join(kept[position] for position in sorted(kept))
+    note = f"\n\n(Omitted for length: {', '.join(omitted)})" if omitted else ""
+    return compacted + note if len(compacted) + len(note) <= max_chars else compacted[:max_chars]
+
+def _job_line_relevance(section: ResumeSection, index: int, line: str, role_skills: set, focus_terms: set) -> float:
+    if section.title == HEADER_SECTION and index == 0:
+        return math.inf  # Usually the job title
+    title = section.title.lower()
+    skills = {match.skill for match in get_skill_matcher().find(line)}
+    return (JOB_SECTION_PRIORITIES.get(title, SECTION_PRIORITIES.get(title, 1)) + 2 * len(skills & role_skills)
+            + len(skills) + len(focus_terms.intersection(tokenize(line))))
+
+def compact_text(text: str, max_chars: int, role: str = "", goal: str = "") -> str:
+    """
+    Clean up free text (e.g. a job description) and fit it into `max_chars`.
+
+    A text that is still too long keeps its most relevant lines rather than
+    its first ones: lines naming taxonomy skills (the role's count double),
+    lines in requirement-like sections and lines mentioning the role or goal
+    come before company blurbs and benefits. Kept lines stay in their
+    original order under their section headings.
+
+    Args:
+        text (str): The text to compact
+        max_chars (int): Character budget for the result
+        role (str): Target role, used to rank lines
+        goal (str): Career goal, used to rank lines
+
+    Returns:
+        str: The compacted text
+    """
+    sections = segment_resume(text)
+    headings = {section.position: section.title for section in sections if section.title != HEADER_SECTION}
+    cleaned = "\n".join(line for section in sections
+                        for line in ([headings[section.position]] if section.position in headings else []) + list(section.lines))
+    if len(cleaned) <= max_chars:
+        return cleaned
+
+    role_skills = set(get_skill_matcher().skills_for_role(role)) if role else set()
+    focus_terms = set(tokenize(f"{role} {goal}"))
+    candidates = [
+        (-_job_line_relevance(section, index, line, role_skills, focus_terms), section.position, index, line)
+        for section in sections for index, line in enumerate(section.lines)
+    ]
+    kept, kept_sections, remaining = {}, set(), max_chars
+    for _, position, index, line in sorted(candidates, key=lambda c: c[:3]):
+        cost = len(line) + 1
+        if position in headings and position not in kept_sections:
+            cost += len(headings[position]) + 1  # The first line kept from a section brings its heading
+        if cost <= remaining:
+            kept[(position, index)] = line
+            kept_sections.add(position)
+            remaining -= cost
+
+    lines, headed = [], set()
+    for position, index in sorted(kept):
+        if position in headings and position not in headed:
+            lines.append(headings[position])
+            headed.add(position)
+        lines.append(kept[(position, index)])
+    return "\n".join(lines)
+
+def condense_resume(resume_text: str, max_chars: int, api_key: Optional[str] = None) -> str:
+    """
+    Summarize a resume that does not fit `max_chars`; shorter ones are returned as is.
+
+    Dropping whole sections loses too much of a long senior profile, so it is
+    condensed with profile_summarizer first. This calls the LLM, so prompts
+    for long resumes should be built off the Streamlit script thread. If it
+    fails (e.g. no API key), the original text is returned and
+    compact_resume trims it instead. `api_key` is passed to the gateway.
+    """
+    if len("\n\n".join(section.text for section in segment_resume(resume_text))) <= max_chars:
+        return resume_text
+    try:
+        rounded = max_chars - max_chars % SUMMARY_LENGTH_STEP
+        return summarize_profile(resume_text, max_chars=rounded or max_chars, api_key=api_key)
+    except ProfileSummaryError:
+        return resume_text
+
+def pack_prompt(build: Callable[..., str], purpose: str, resume_text: str, role: str = "", goal: str = "",
+                job_description: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    """
+    Build a prompt whose resume (and job description) are compacted to fit the purpose's budget.
+
+    Resumes over the budget are first summarized to the space left for
+    them (see condense_resume).
+
+    Args:
+        build (callable): Prompt builder called as build(resume) or, when a
+            job description is given, build(resume, job_description)
+        purpose (str): What the prompt is for, one of the *_PROMPT constants
+        resume_text (str): The text of the user's resume
+        role (str): Target role, used to rank resume sections
+        goal (str): Career goal, used to rank resume sections
+        job_description (str): Optional job description; gets at most half
+            of the space unless the resume needs less
+        api_key (str): Gemini API key for condensing a long resume; None uses the gateway's default
+
+    Returns:
+        str: The complete prompt
+    """
+    budget = char_budget(purpose)
+    if job_description is None:
+        available = max(0, budget - len(build("")))
+        resume_text = condense_resume(resume_text, available, api_key)
+        return build(compact_resume(resume_text, available, role, goal))
+
+    available = max(0, budget - len(build("", "")))
+    job_need = len(compact_text(job_description, available, role, goal))
+    resume_text = condense_resume(resume_text, max(available // 2, available - job_need), api_key)
+    resume_need = len("\n\n".join(section.text for section in segment_resume(resume_text)))
+    job_description = compact_text(job_description, max(available // 2, available - resume_need), role, goal)
+    resume = compact_resume(resume_text, available - len(job_description), role, goal, context=job_description)
+    return build(resume, job_description)
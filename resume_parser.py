@@ -1,9 +1,60 @@
 import fitz  # PyMuPDF
-from PIL import Image
 import pytesseract
 import os
 import tempfile
 import json
+import hashlib
+import threading
+import time
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from disk_cache import DiskCache, CACHE_DIR, make_key
+
+OCR_PROBE_DPI = 150  # Quick first pass used to measure text size
+OCR_MIN_DPI = 150
+OCR_MAX_DPI = 400
+OCR_TARGET_TEXT_HEIGHT = 32  # Word box height in pixels at which Tesseract reads best
+OCR_MIN_CONFIDENCE = 85  # Mean word confidence at which the first pass is kept as is
+OCR_MAX_PIXELS = 12_000_000  # Upper bound on pixels rendered for a single page
+OCR_WORKERS = int(os.getenv("SKILLWISE_OCR_WORKERS", "0")) or os.cpu_count() or 1
+OCR_TIMEOUT = float(os.getenv("SKILLWISE_OCR_TIMEOUT", "120"))  # Seconds for a whole document
+MIN_PAGE_TEXT_CHARS = 50  # Pages with less extractable text than this are OCR candidates
+MIN_IMAGE_COVERAGE = 0.1  # Fraction of the page covered by images that suggests a scan
+MIN_DRAWING_PATHS = 20  # Outlined text is one path per glyph; rules and borders are a handful
+MIN_DRAWING_COVERAGE = 0.05  # Fraction of the page covered by vector drawings that suggests outlined text
+MAX_OCR_FAILED_FRACTION = 0.5  # Fail the parse when OCR fails on more of the pages than this
+
+RESUME_CACHE_VERSION = 2  # Bump when extraction changes so stale results are ignored
+RESUME_CACHE_MAX_ENTRIES = 1000
+RESUME_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+_resume_cache = None
+
+def open_pdf(source):
+    """
+    Open a PDF from a file path, raw bytes or a binary file-like object.
+
+    In-memory sources are opened straight from the buffer, so uploads never
+    touch the disk.
+
+    Raises:
+        ValueError: If the source is not a readable PDF
+    """
+    try:
+        if isinstance(source, str):
+            doc = fitz.open(source)
+        else:
+            data = source.read() if hasattr(source, "read") else source
+            doc = fitz.open(stream=bytes(data), filetype="pdf")
+    except Exception:
+        raise ValueError("Invalid PDF file format")
+    if not doc.is_pdf:
+        doc.close()
+        raise ValueError("Invalid PDF file format")
+    return doc
 
 def is_valid_pdf(file_path):
     """Check if file is a valid PDF."""
@@ -20,65 +71,315 @@ def is_valid_pdf(file_path):
     except Exception:
         return False
 
-def extract_text_from_pdf(pdf_path):
+def extract_text_from_pdf(pdf_source):
     """Extract text from PDF using PyMuPDF."""
     text = ""
     try:
-        doc = fitz.open(pdf_path)
-        for page in doc:
-            text += page.get_text()
-        doc.close()
+        with open_pdf(pdf_source) as doc:
+            for page in doc:
+                text += page.get_text()
         return text
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
-def extract_text_with_ocr(pdf_path):
-    """Extract text from PDF using OCR."""
-    text = ""
+def _get_ocr_executor():
+    """Return the shared OCR process pool, creating it on first use."""
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is None:
+            # Spawned workers avoid forking the (multi-threaded) Streamlit server
+            _ocr_executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _ocr_executor
+
+def _reset_ocr_executor():
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is not None:
+            _ocr_executor.shutdown(wait=False, cancel_futures=True)
+        _ocr_executor = None
+
+def _cap_dpi(page, dpi):
+    """Lower `dpi` if needed so the rendered page stays under OCR_MAX_PIXELS."""
+    area_sq_inches = (page.rect.width / 72) * (page.rect.height / 72)
+    if area_sq_inches <= 0:
+        return dpi
+    return max(72, min(dpi, int((OCR_MAX_PIXELS / area_sq_inches) ** 0.5)))
+
+def _render_grayscale(page, dpi, image_path):
+    """
+    Render a page straight to 8-bit grayscale and write the raw samples to `image_path`.
+
+    Tesseract reads the PGM file directly, so the bitmap never goes through
+    a PIL RGB copy or PNG encoding.
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    pix.save(image_path, output="pgm")
+
+def _words_to_text(data):
+    """Rebuild plain text from pytesseract.image_to_data output, keeping line breaks."""
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        if word.strip():
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+    return "\n".join(" ".join(words) for _, words in sorted(lines.items())) + "\n"
+
+def choose_ocr_dpi(page, probe_data, probe_dpi=OCR_PROBE_DPI):
+    """
+    Pick the render DPI for a page from its size and a first-pass OCR probe.
+
+    Returns None when the probe itself is good enough to keep, or when the
+    page cannot be rendered any sharper than the probe.
+    """
+    heights = sorted(h for h, conf, word in zip(probe_data["height"], probe_data["conf"], probe_data["text"])
+                     if word.strip() and float(conf) >= 0)
+    if not heights:
+        dpi = _cap_dpi(page, OCR_MAX_DPI)  # Nothing legible at probe resolution, the text may be tiny
+    else:
+        median_height = heights[len(heights) // 2]
+        confidences = [float(conf) for conf, word in zip(probe_data["conf"], probe_data["text"]) if word.strip()]
+        mean_confidence = sum(confidences) / len(confidences)
+        if median_height >= OCR_TARGET_TEXT_HEIGHT * 0.8 and mean_confidence >= OCR_MIN_CONFIDENCE:
+            return None
+        dpi = int(probe_dpi * OCR_TARGET_TEXT_HEIGHT / median_height)
+        dpi = _cap_dpi(page, max(OCR_MIN_DPI, min(OCR_MAX_DPI, dpi)))
+    return dpi if dpi > probe_dpi else None  # Re-reading at the probe resolution would only repeat the probe
+
+def _ocr_loaded_page(page, timeout=0):
+    """Render a page of an open document and run Tesseract on it."""
+    image_fd, image_path = tempfile.mkstemp(suffix=".pgm")
+    os.close(image_fd)
     try:
-        doc = fitz.open(pdf_path)
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            pix = page.get_pixmap(dpi=300)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            text += pytesseract.image_to_string(img)
-        doc.close()
-        return text
+        probe_dpi = _cap_dpi(page, OCR_PROBE_DPI)
+        _render_grayscale(page, probe_dpi, image_path)
+        probe_data = pytesseract.image_to_data(image_path, output_type=pytesseract.Output.DICT, timeout=timeout)
+        dpi = choose_ocr_dpi(page, probe_data, probe_dpi)
+        if dpi is None:
+            return _words_to_text(probe_data)
+        _render_grayscale(page, dpi, image_path)
+        return pytesseract.image_to_string(image_path, timeout=timeout)
+    finally:
+        os.remove(image_path)
+
+def _ocr_page(page_pdf_bytes, timeout=0):
+    """OCR a single-page PDF passed as bytes. Runs inside a worker process."""
+    with fitz.open(stream=page_pdf_bytes, filetype="pdf") as doc:
+        return _ocr_loaded_page(doc[0], timeout)
+
+def _single_page_bytes(doc, page_num):
+    """Copy one page into a standalone PDF so workers receive only the bytes they need."""
+    with fitz.open() as page_doc:
+        page_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        return page_doc.tobytes()
+
+def ocr_pages(doc, page_numbers, max_workers=None, timeout=None):
+    """
+    OCR the given pages of an open PDF and return their text in the same order.
+
+    Pages are rendered and recognized in parallel on a shared process pool.
+
+    Args:
+        doc (fitz.Document): The open PDF document
+        page_numbers (list): Zero-based page numbers to OCR
+        max_workers (int): Maximum pages processed at once (defaults to OCR_WORKERS)
+        timeout (float): Overall time limit in seconds (defaults to OCR_TIMEOUT)
+    """
+    timeout = OCR_TIMEOUT if timeout is None else timeout
+    page_numbers = list(page_numbers)
+    try:
+        workers = min(max_workers or OCR_WORKERS, len(page_numbers))
+        if workers <= 1:
+            return [_ocr_loaded_page(doc[page_num], timeout) for page_num in page_numbers]
+
+        executor = _get_ocr_executor()
+        deadline = time.monotonic() + timeout
+        page_texts = [""] * len(page_numbers)
+        in_flight = {}
+        next_index = 0
+        while next_index < len(page_numbers) or in_flight:
+            # Keep at most `workers` pages of this document in the shared pool at once
+            while next_index < len(page_numbers) and len(in_flight) < workers:
+                remaining = max(1.0, deadline - time.monotonic())
+                page_bytes = _single_page_bytes(doc, page_numbers[next_index])
+                in_flight[executor.submit(_ocr_page, page_bytes, remaining)] = next_index
+                next_index += 1
+            done, _ = wait(in_flight, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                for future in in_flight:
+                    future.cancel()
+                raise TimeoutError(f"OCR did not finish within {timeout:g} seconds")
+            for future in done:
+                page_texts[in_flight.pop(future)] = future.result()
+        return page_texts
+    except BrokenProcessPool as e:
+        _reset_ocr_executor()
+        raise Exception(f"Failed to perform OCR: worker pool crashed ({str(e)})")
     except Exception as e:
         raise Exception(f"Failed to perform OCR: {str(e)}")
 
-def parse_resume(pdf_path):
+def extract_text_with_ocr(pdf_source, max_workers=None, timeout=None):
+    """Extract text from every page of a PDF using OCR."""
+    with open_pdf(pdf_source) as doc:
+        return "".join(ocr_pages(doc, range(len(doc)), max_workers, timeout))
+
+def image_coverage(page):
+    """Return the fraction of the page area covered by embedded images."""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return min(1.0, covered / page_area)
+
+def drawing_coverage(page, drawings=None):
+    """Return the fraction of the page area covered by vector drawings' bounding boxes."""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    drawings = page.get_cdrawings() if drawings is None else drawings
+    covered = sum(abs(fitz.Rect(drawing["rect"]) & page.rect) for drawing in drawings)
+    return min(1.0, covered / page_area)
+
+def page_needs_ocr(page, text=None):
+    """
+    Decide whether a page lacks a usable text layer.
+
+    A page is OCRed when it has almost no extractable text but is covered by
+    images (a scan) or by many vector drawings (outlined text). Truly blank
+    pages, and pages whose only drawings are rules or borders, are skipped.
+    """
+    if text is None:
+        text = page.get_text()
+    if len(text.strip()) >= MIN_PAGE_TEXT_CHARS:
+        return False
+    if image_coverage(page) >= MIN_IMAGE_COVERAGE:
+        return True
+    drawings = page.get_cdrawings()
+    return len(drawings) >= MIN_DRAWING_PATHS and drawing_coverage(page, drawings) >= MIN_DRAWING_COVERAGE
+
+def extract_text_hybrid(doc, max_workers=None, timeout=None):
+    """
+    Extract text page by page, running OCR only on pages without usable text.
+
+    Args:
+        doc (fitz.Document): The open PDF document
+
+    Returns:
+        tuple: (text, page_sources) where page_sources lists "text", "ocr",
+        "ocr_failed" or "empty" for each page, in page order
+
+    Raises:
+        Exception: If OCR fails and the remaining pages are too little of the document
+    """
+    page_texts = []
+    page_sources = []
+    ocr_page_numbers = []
+    for page in doc:
+        text = page.get_text()
+        if page_needs_ocr(page, text):
+            ocr_page_numbers.append(page.number)
+            page_sources.append("ocr")
+        else:
+            page_sources.append("text" if text.strip() else "empty")
+        page_texts.append(text)
+
+    if ocr_page_numbers:
+        try:
+            for page_num, text in zip(ocr_page_numbers, ocr_pages(doc, ocr_page_numbers, max_workers, timeout)):
+                page_texts[page_num] = text
+        except Exception as e:
+            # Keep the text-layer pages if they carry enough content on their own
+            # and most of the document was readable; callers warn about the rest
+            if len("".join(page_texts).strip()) < 100 or len(ocr_page_numbers) > len(page_sources) * MAX_OCR_FAILED_FRACTION:
+                raise Exception(f"OCR failed on {len(ocr_page_numbers)} of {len(page_sources)} pages ({str(e)})")
+            for page_num in ocr_page_numbers:
+                page_sources[page_num] = "ocr_failed"
+
+    return "".join(page_texts), page_sources
+
+def _get_resume_cache():
+    """Return the resume parse cache, created lazily so OCR worker processes never open it."""
+    global _resume_cache
+    if _resume_cache is None:
+        _resume_cache = DiskCache(os.path.join(CACHE_DIR, "resume_parse.sqlite3"),
+                                  max_entries=RESUME_CACHE_MAX_ENTRIES, max_bytes=RESUME_CACHE_MAX_BYTES)
+    return _resume_cache
+
+def parse_resume(pdf_source):
     """Parse resume with improved error handling and validation."""
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"Resume file not found: {pdf_path}")
-    
-    if not is_valid_pdf(pdf_path):
-        raise ValueError("Invalid PDF file format")
+    return parse_resume_with_metadata(pdf_source)[0]
+
+def parse_resume_with_metadata(pdf_source, ocr_workers=None):
+    """
+    Parse a resume and report how each page was extracted.
+
+    Args:
+        pdf_source: A file path, the PDF bytes, or a binary file-like object.
+            The document is opened once and that handle is reused for
+            validation, text extraction and OCR.
+        ocr_workers (int): Pages OCRed at once (defaults to OCR_WORKERS);
+            1 runs OCR inline without the shared process pool
+
+    Returns:
+        tuple: (text, metadata) where metadata holds the per-page sources
+        ("text", "ocr", "ocr_failed" or "empty"), their counts and the
+        1-based numbers of pages whose OCR failed
+    """
+    pdf_path = pdf_source if isinstance(pdf_source, str) else None
+    if pdf_path is not None:
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"Resume file not found: {pdf_path}")
+        if not pdf_path.lower().endswith('.pdf'):
+            raise ValueError("Invalid PDF file format")
     
+    doc = open_pdf(pdf_source)
     try:
-        # First attempt: Direct text extraction
-        text = extract_text_from_pdf(pdf_path)
-        
-        # If text extraction yields insufficient content, try OCR
-        if len(text.strip()) < 100:
-            text = extract_text_with_ocr(pdf_path)
+        # Use the text layer where present and OCR only the pages that lack one
+        text, page_sources = extract_text_hybrid(doc, max_workers=ocr_workers)
             
         # Validate extracted text
         if not text.strip():
             raise ValueError("No text could be extracted from the resume")
             
-        return text.strip()
+        metadata = {
+            "page_sources": page_sources,
+            "text_pages": page_sources.count("text"),
+            "ocr_pages": page_sources.count("ocr"),
+            "ocr_failed_pages": [page_num + 1 for page_num, source in enumerate(page_sources) if source == "ocr_failed"],
+        }
+        return text.strip(), metadata
         
     except Exception as e:
         raise Exception(f"Failed to parse resume: {str(e)}")
     finally:
+        doc.close()
         # Cleanup if file was created in temp directory
-        if os.path.dirname(pdf_path) == tempfile.gettempdir():
+        if pdf_path is not None and os.path.dirname(pdf_path) == tempfile.gettempdir():
             try:
                 os.remove(pdf_path)
             except:
                 pass
 
+def parse_resume_cached(file_bytes, ocr_workers=None):
+    """
+    Parse an uploaded PDF, reusing the stored result when identical bytes were seen before.
+
+    Results are keyed by the SHA-256 of the file contents and kept in an
+    on-disk LRU cache, so re-uploading a resume skips extraction and OCR.
+
+    Returns:
+        tuple: (text, metadata) as returned by parse_resume_with_metadata
+    """
+    cache = _get_resume_cache()
+    cache_key = make_key("resume", RESUME_CACHE_VERSION, hashlib.sha256(file_bytes).hexdigest())
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached["text"], cached["metadata"]
+
+    text, metadata = parse_resume_with_metadata(file_bytes, ocr_workers)
+    if "ocr_failed" not in metadata["page_sources"]:  # Let transient OCR failures retry next time
+        cache.set(cache_key, {"text": text, "metadata": metadata})
+    return text, metadata
+
 def parse_linkedin_json(json_data):
     """
     Parses LinkedIn profile data from a JSON object and extracts relevant text.
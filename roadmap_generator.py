@@ -1,30 +1,55 @@
 # roadmap_generator.py
-import google.generativeai as genai
-import os
+import threading
 import time
-from typing import Optional
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+import llm_gateway
+from llm_gateway import ROADMAP_MODEL
+from prompt_builder import FOCUSED_ROADMAP_PROMPT, ROADMAP_PROMPT, char_budget, pack_prompt
+
+MIN_PROMPT_CHARS = 50
+MAX_PROMPT_CHARS = max(char_budget(ROADMAP_PROMPT), char_budget(FOCUSED_ROADMAP_PROMPT))  # Both are sent by generate_roadmap
 
 class RoadmapGenerationError(Exception):
     """Custom exception for roadmap generation errors."""
     pass
 
+def build_roadmap_prompt(resume_text: str, role: str, goal: str, api_key: Optional[str] = None) -> str:
+    """
+    Prompt for a general 6-month roadmap from a resume, target role and career goal.
+    
+    The resume is compacted to the roadmap prompt's budget, so long resumes
+    still produce a valid prompt; condensing one uses `api_key`.
+    """
+    return pack_prompt(lambda resume: (
+        f"Resume Text:\n{resume}\n\n"
+        f"Target Role: {role}\n"
+        f"Career Goal: {goal}\n\n"
+        "Generate a personalized 6-month learning roadmap. Focus on free or low-cost resources. "
+        "Include specific course suggestions (if possible, from platforms like Coursera, edX, YouTube), "
+        "project ideas to build a portfolio, and a general career plan or phases. "
+        "The roadmap should be structured with clear phases, modules, and actionable tasks. "
+        "Indicate estimated durations for tasks or modules (e.g., in weeks or days)."
+    ), ROADMAP_PROMPT, resume_text, role, goal, api_key=api_key)
+
 def validate_prompt(prompt: str) -> bool:
     """Validate the prompt for roadmap generation."""
     if not prompt or not isinstance(prompt, str):
         return False
-    if len(prompt) < 50:
+    if len(prompt) < MIN_PROMPT_CHARS:
         return False
-    if len(prompt) > 4000:  # Gemini's context window limit
+    if len(prompt) > MAX_PROMPT_CHARS:  # The roadmap prompts' input budget
         return False
     return True
 
-def generate_roadmap(prompt: str, max_retries: int = 3) -> str:
+def generate_roadmap(prompt: str, max_retries: int = 3, api_key: Optional[str] = None) -> str:
     """
     Generate a learning roadmap using Google's Gemini model.
     
     Args:
         prompt (str): The prompt for roadmap generation
         max_retries (int): Maximum number of retry attempts
+        api_key (str): Gemini API key, e.g. the session's; None uses the gateway's default
         
     Returns:
         str: Generated roadmap text
@@ -33,20 +58,15 @@ def generate_roadmap(prompt: str, max_retries: int = 3) -> str:
         RoadmapGenerationError: If generation fails after retries
     """
     if not validate_prompt(prompt):
-        raise RoadmapGenerationError("Invalid prompt. Please provide a detailed prompt between 50 and 4000 characters.")
+        raise RoadmapGenerationError(f"Invalid prompt. Please provide a detailed prompt between {MIN_PROMPT_CHARS} and {MAX_PROMPT_CHARS} characters.")
     
     retry_count = 0
     last_error = None
     
+    gateway = llm_gateway.get_gateway()
     while retry_count < max_retries:
         try:
-            model = genai.GenerativeModel("gemini-2.5-flash-lite")
-            response = model.generate_content(prompt)
-            
-            if not response or not response.text:
-                raise RoadmapGenerationError("Empty response from model")
-                
-            return response.text.strip()
+            return gateway.generate(prompt, model=ROADMAP_MODEL, api_key=api_key)
             
         except Exception as e:
             last_error = str(e)
@@ -58,11 +78,82 @@ def generate_roadmap(prompt: str, max_retries: int = 3) -> str:
     # Try to list models to help debug
     available_models = []
     try:
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                available_models.append(m.name)
+        available_models = gateway.list_models(api_key)
     except Exception as list_err:
         available_models = [f"Could not list models: {str(list_err)}"]
     
 
     raise RoadmapGenerationError(f"Failed to generate roadmap after {max_retries} attempts. Last error: {last_error}. Available models: {available_models}")
+
+def generate_roadmap_stream(prompt: str, max_retries: int = 3,
+                            cancel_event: Optional[threading.Event] = None,
+                            api_key: Optional[str] = None) -> Iterator[str]:
+    """
+    Generate a learning roadmap, yielding text chunks as the model produces them.
+    
+    Failures before the first chunk are retried with exponential backoff;
+    once text has been yielded, a failure is raised immediately.
+    
+    Args:
+        prompt (str): The prompt for roadmap generation
+        max_retries (int): Maximum number of retry attempts
+        cancel_event (threading.Event): Set to abort a pending retry backoff
+        api_key (str): Gemini API key, e.g. the session's; None uses the gateway's default
+        
+    Yields:
+        str: Roadmap text chunks in order
+        
+    Raises:
+        RoadmapGenerationError: If generation fails
+    """
+    if not validate_prompt(prompt):
+        raise RoadmapGenerationError(f"Invalid prompt. Please provide a detailed prompt between {MIN_PROMPT_CHARS} and {MAX_PROMPT_CHARS} characters.")
+    
+    gateway = llm_gateway.get_gateway()
+    last_error = None
+    for attempt in range(1, max_retries + 1):
+        started = False
+        try:
+            for chunk in gateway.stream(prompt, model=ROADMAP_MODEL, api_key=api_key):
+                started = True
+                yield chunk
+            return
+        except Exception as e:
+            if started:
+                raise RoadmapGenerationError(f"Roadmap stream interrupted: {str(e)}")
+            last_error = str(e)
+            if attempt < max_retries:
+                # Exponential backoff, cut short if the caller cancels
+                if cancel_event is not None and cancel_event.wait(2 ** attempt):
+                    raise RoadmapGenerationError("Roadmap generation cancelled")
+                elif cancel_event is None:
+                    time.sleep(2 ** attempt)
+    
+    raise RoadmapGenerationError(f"Failed to generate roadmap after {max_retries} attempts. Last error: {last_error}")
+
+def run_roadmap_job(job, record: Dict, store, api_key: Optional[str] = None) -> str:
+    """
+    Background job: stream a roadmap into `job` and save it once complete.
+    
+    The prompt is built here rather than by the caller, since condensing an
+    oversized resume takes several LLM calls of its own.
+    
+    Args:
+        job (job_runner.Job): The running job; receives streamed text
+        record (dict): Fields saved with the roadmap (id, resume, goal, role)
+        store (roadmap_store.RoadmapStore): Where the finished roadmap is saved and made active
+        api_key (str): Gemini API key of the session that started the job
+        
+    Returns:
+        str: Generated roadmap text
+    """
+    prompt = build_roadmap_prompt(record["resume"], record["role"], record["goal"], api_key)
+    job.check_cancelled()
+    for chunk in generate_roadmap_stream(prompt, cancel_event=job.cancel_event, api_key=api_key):
+        job.check_cancelled()
+        job.append_text(chunk)
+    roadmap = job.partial_text.strip()
+    job.check_cancelled()
+    now = datetime.now().isoformat()
+    store.add_roadmap({**record, "roadmap": roadmap, "timestamp": now, "last_accessed": now})
+    return roadmap
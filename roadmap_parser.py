@@ -0,0 +1,208 @@
+# roadmap_parser.py
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional, Tuple, Union
+
+PARSE_CACHE_SIZE = 64
+
+# Line kinds, in the order they are checked
+PHASE = "phase"    # "## Phase 1: Foundations (Weeks 1-4)"
+MODULE = "module"  # "**Module 1.1: Python Basics**"
+TASK = "task"      # "* Learn syntax (1 week)" or "- [ ] Learn syntax"
+BULLET = "bullet"  # "- Resources: ..." / "• ..."
+TEXT = "text"
+
+DEFAULT_PHASE_DURATION = timedelta(weeks=4)
+DEFAULT_MODULE_DURATION = timedelta(weeks=2)
+DEFAULT_TASK_DURATION = timedelta(weeks=1)
+
+_CHECKBOX_RE = re.compile(r"- \[.\] (.+)")
+_PHASE_WEEKS_RE = re.compile(r"\(Weeks (\d+)-(\d+)\)", re.IGNORECASE)
+_PHASE_WEEKS_STRIP_RE = re.compile(r"\s*\(Weeks \d+-\d+\)", re.IGNORECASE)
+_DURATION_NOTE_RE = re.compile(r"(\(.*\))")
+_DURATION_RE = re.compile(r"\((\d+)\s*(week|day)s?\)", re.IGNORECASE)
+
+@dataclass(frozen=True)
+class RoadmapTask:
+    id: str                  # Stable content-derived ID; progress is keyed by it
+    legacy_key: str          # "<section>_<line>" key used by progress saved before task IDs
+    label: str               # Checklist label: the line without its marker
+    name: str                # Timeline name: the label without its duration note
+    duration: timedelta
+    line: str                # The stripped source line
+    phase: Optional[str]
+    section: str
+
+@dataclass(frozen=True)
+class RoadmapSection:
+    title: str
+    is_module: bool          # False for content directly under a phase header
+    items: Tuple[Union[RoadmapTask, str], ...]  # Tasks and plain lines, in order
+
+    @property
+    def tasks(self) -> Tuple[RoadmapTask, ...]:
+        return tuple(item for item in self.items if isinstance(item, RoadmapTask))
+
+@dataclass(frozen=True)
+class RoadmapPhase:
+    title: Optional[str]     # Header text; None for content before the first phase
+    name: str                # Title without the "(Weeks a-b)" range
+    duration: timedelta
+    sections: Tuple[RoadmapSection, ...]
+
+@dataclass(frozen=True)
+class RoadmapLine:
+    kind: str
+    text: str                # Header title for phases/modules, marker-less text for tasks/bullets
+
+@dataclass(frozen=True)
+class RoadmapTree:
+    digest: str
+    phases: Tuple[RoadmapPhase, ...]
+    lines: Tuple[RoadmapLine, ...]
+    tasks: Tuple[RoadmapTask, ...]
+    tasks_by_id: Dict[str, RoadmapTask]
+
+def roadmap_hash(roadmap_text: str) -> str:
+    """Content hash identifying a roadmap's text."""
+    return hashlib.sha256(roadmap_text.encode("utf-8")).hexdigest()[:16]
+
+def task_id(phase: Optional[str], section: str, line: str, occurrence: int = 0) -> str:
+    """
+    Stable ID for a task, derived from where it sits and what it says.
+
+    Editing or reordering other tasks leaves the ID unchanged; `occurrence`
+    tells apart identical lines within the same section.
+    """
+    base = "\x1f".join((phase or "", section, " ".join(line.split()), str(occurrence)))
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()[:12]
+
+def parse_duration(duration_str: str) -> timedelta:
+    """Parses duration like '(1 week)', '(3 days)' into timedelta."""
+    match = _DURATION_RE.search(duration_str) if duration_str else None
+    if match:
+        value = int(match.group(1))
+        if match.group(2).lower() == "week":
+            return timedelta(weeks=value)
+        return timedelta(days=value)
+    return DEFAULT_TASK_DURATION
+
+def _phase_name_and_duration(title: str):
+    match = _PHASE_WEEKS_RE.search(title)
+    if not match:
+        return title, DEFAULT_PHASE_DURATION
+    weeks = int(match.group(2)) - int(match.group(1)) + 1
+    return _PHASE_WEEKS_STRIP_RE.sub("", title).strip(), timedelta(weeks=weeks)
+
+def classify_line(line: str):
+    """
+    Classify a stripped roadmap line.
+
+    Returns:
+        tuple: (kind, text) where text is the header title or the line without its marker
+    """
+    if line.startswith("##"):
+        return PHASE, line[2:].strip()
+    if line.startswith("**") and line.endswith("**"):
+        return MODULE, line[2:-2].strip()
+    if line.startswith("*"):
+        return TASK, line[1:]
+    checkbox = _CHECKBOX_RE.match(line)
+    if checkbox:
+        return TASK, checkbox.group(1)
+    if line.startswith("-") or line.startswith("•"):
+        return BULLET, line[1:].strip()
+    return TEXT, line
+
+def _build_tree(roadmap_text: str, digest: str) -> RoadmapTree:
+    phases, lines, tasks = [], [], []
+    occurrences = {}
+    phase = {"title": None, "sections": []}
+    section = None
+
+    def close_section():
+        if section is not None:
+            phase["sections"].append(RoadmapSection(section["title"], section["is_module"], tuple(section["items"])))
+
+    def close_phase():
+        if phase["title"] is None and not phase["sections"]:
+            return  # Nothing appeared before the first phase header
+        name, duration = _phase_name_and_duration(phase["title"]) if phase["title"] is not None else ("General", DEFAULT_PHASE_DURATION)
+        phases.append(RoadmapPhase(phase["title"], name, duration, tuple(phase["sections"])))
+
+    for raw_line in roadmap_text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        kind, text = classify_line(line)
+        lines.append(RoadmapLine(kind, text))
+
+        if kind == PHASE:
+            close_section()
+            close_phase()
+            phase = {"title": text, "sections": []}
+            section = None
+        elif kind == MODULE:
+            close_section()
+            section = {"title": text, "is_module": True, "items": []}
+        else:
+            if section is None:
+                # Content directly under a phase is grouped under the phase title
+                section = {"title": phase["title"] or "Unknown Section", "is_module": False, "items": []}
+            if kind == TASK:
+                note = _DURATION_NOTE_RE.search(text)
+                duration_text = note.group(1) if note else ""
+                position = (phase["title"], section["title"], line)
+                occurrence = occurrences.get(position, 0)
+                occurrences[position] = occurrence + 1
+                task = RoadmapTask(
+                    id=task_id(phase["title"], section["title"], line, occurrence),
+                    legacy_key=f"{section['title']}_{line}",
+                    label=text,
+                    name=text.replace(duration_text, "").strip() if duration_text else text.strip(),
+                    duration=parse_duration(duration_text),
+                    line=line,
+                    phase=phase["title"],
+                    section=section["title"],
+                )
+                section["items"].append(task)
+                tasks.append(task)
+            else:
+                section["items"].append(line)
+    close_section()
+    close_phase()
+    return RoadmapTree(digest, tuple(phases), tuple(lines), tuple(tasks), {task.id: task for task in tasks})
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def parse_roadmap(roadmap_text: str) -> RoadmapTree:
+    """
+    Parse roadmap markdown into a phase > section > task tree in one pass.
+
+    Results are memoized by content hash, so the timeline, checklist, PDF
+    export and progress tracking all share a single parse per roadmap.
+
+    Args:
+        roadmap_text (str): The roadmap markdown
+
+    Returns:
+        RoadmapTree: Immutable parsed roadmap
+    """
+    roadmap_text = roadmap_text or ""
+    digest = roadmap_hash(roadmap_text)
+    with _cache_lock:
+        tree = _cache.get(digest)
+        if tree is not None:
+            _cache.move_to_end(digest)
+            return tree
+    tree = _build_tree(roadmap_text, digest)
+    with _cache_lock:
+        _cache[digest] = tree
+        while len(_cache) > PARSE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tree
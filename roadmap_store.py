@@ -0,0 +1,411 @@
+# roadmap_store.py
+import atexit
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ROADMAPS_DB_PATH = os.getenv("SKILLWISE_DB_PATH", os.path.join(APP_DIR, "roadmaps.sqlite3"))
+LEGACY_JSON_PATH = os.path.join(APP_DIR, "roadmaps_db.json")
+
+PROGRESS_FLUSH_DELAY = 0.5  # Seconds a progress change may wait so rapid toggles coalesce
+COMPACT_EVERY_FLUSHES = 200  # Checkpoint and prune the database after this many flushes
+
+ROADMAP_COLUMNS = ("id", "resume", "goal", "role", "roadmap", "timestamp", "last_accessed", "active")
+# Everything except the large resume/roadmap texts, for listings
+SUMMARY_COLUMNS = ("id", "goal", "role", "timestamp", "last_accessed", "active", "version")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roadmaps (
+    id TEXT PRIMARY KEY,
+    resume TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    role TEXT NOT NULL,
+    roadmap TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    last_accessed TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_roadmaps_active ON roadmaps(active);
+CREATE INDEX IF NOT EXISTS idx_roadmaps_role ON roadmaps(role);
+CREATE INDEX IF NOT EXISTS idx_roadmaps_last_accessed ON roadmaps(last_accessed);
+CREATE TABLE IF NOT EXISTS progress (
+    roadmap_id TEXT NOT NULL REFERENCES roadmaps(id) ON DELETE CASCADE,
+    task_key TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (roadmap_id, task_key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full-text index over the searchable columns, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS roadmaps_fts USING fts5(role, goal, roadmap, content='roadmaps', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS roadmaps_fts_insert AFTER INSERT ON roadmaps BEGIN
+    INSERT INTO roadmaps_fts(rowid, role, goal, roadmap) VALUES (new.rowid, new.role, new.goal, new.roadmap);
+END;
+CREATE TRIGGER IF NOT EXISTS roadmaps_fts_delete AFTER DELETE ON roadmaps BEGIN
+    INSERT INTO roadmaps_fts(roadmaps_fts, rowid, role, goal, roadmap) VALUES ('delete', old.rowid, old.role, old.goal, old.roadmap);
+END;
+CREATE TRIGGER IF NOT EXISTS roadmaps_fts_update AFTER UPDATE OF role, goal, roadmap ON roadmaps BEGIN
+    INSERT INTO roadmaps_fts(roadmaps_fts, rowid, role, goal, roadmap) VALUES ('delete', old.rowid, old.role, old.goal, old.roadmap);
+    INSERT INTO roadmaps_fts(rowid, role, goal, roadmap) VALUES (new.rowid, new.role, new.goal, new.roadmap);
+END;
+"""
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+class RoadmapStoreError(Exception):
+    """Custom exception for roadmap store errors."""
+    pass
+
+def roadmap_id(resume: str, goal: str, role: str) -> str:
+    """ID of the roadmap for a resume, goal and role; regenerating for the same inputs reuses it."""
+    base = (resume.strip() + goal.strip() + role.strip()).encode("utf-8")
+    return hashlib.sha256(base).hexdigest()[:16]
+
+def _row_to_roadmap(row, columns=ROADMAP_COLUMNS) -> Dict:
+    roadmap = dict(zip(columns, row))
+    roadmap["active"] = bool(roadmap["active"])
+    return roadmap
+
+class RoadmapStore:
+    """
+    SQLite-backed store for saved roadmaps and their task progress.
+
+    The database runs in WAL mode so readers never block the writer, and
+    every change touches only the rows it affects instead of rewriting the
+    whole collection. Progress lives in its own table, one row per task.
+
+    Single-task progress changes go through a short write-behind buffer:
+    repeated toggles of the same task collapse into one pending value and
+    are written together after `flush_delay` seconds. Reads see pending
+    values, so callers never observe the delay.
+    """
+
+    def __init__(self, path: str = ROADMAPS_DB_PATH, legacy_json_path: Optional[str] = LEGACY_JSON_PATH,
+                 flush_delay: float = PROGRESS_FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._pending = {}  # (roadmap_id, task_key) -> completed
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+        self._flush_count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Databases created before records were versioned
+            if "version" not in {row[1] for row in conn.execute("PRAGMA table_info(roadmaps)")}:
+                conn.execute("ALTER TABLE roadmaps ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self.has_fts = self._init_fts(conn)
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+        atexit.register(self.flush)  # Don't lose buffered toggles on shutdown
+
+    @staticmethod
+    def _init_fts(conn: sqlite3.Connection) -> bool:
+        """Create the full-text index, backfilling it for existing rows. Returns False without FTS5."""
+        existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'roadmaps_fts'").fetchone()
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            return False  # SQLite built without FTS5; search falls back to LIKE
+        if not existed:
+            conn.execute("INSERT INTO roadmaps_fts(roadmaps_fts) VALUES ('rebuild')")
+        return True
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        Import roadmaps from the legacy roadmaps_db.json file once.
+
+        Returns:
+            int: Number of roadmaps imported (0 if already migrated or no file)
+        """
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                return 0
+            records = []
+            if os.path.exists(json_path):
+                with open(json_path, "r") as f:
+                    try:
+                        records = json.load(f)
+                    except Exception:
+                        records = []
+            imported = 0
+            for r in records if isinstance(records, list) else []:
+                try:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO roadmaps (id, resume, goal, role, roadmap, timestamp, last_accessed, active)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (r["id"], r.get("resume", ""), r.get("goal", ""), r.get("role", ""), r.get("roadmap", ""),
+                         r["timestamp"], r.get("last_accessed", r["timestamp"]), int(bool(r.get("active")))),
+                    )
+                except (KeyError, TypeError):
+                    continue  # Skip malformed records
+                imported += cursor.rowcount
+                progress = r.get("progress")
+                if cursor.rowcount and isinstance(progress, dict):
+                    self._write_progress(conn, r["id"], progress)
+            # Keep at most one active roadmap, as the app expects
+            active_ids = [row[0] for row in conn.execute("SELECT id FROM roadmaps WHERE active = 1 ORDER BY last_accessed DESC")]
+            for extra_id in active_ids[1:]:
+                conn.execute("UPDATE roadmaps SET active = 0 WHERE id = ?", (extra_id,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (datetime.now().isoformat(),))
+            return imported
+
+    # --- Roadmaps ---
+
+    def _search_filter(self, query: str) -> Tuple[str, list]:
+        """SQL (joins and WHERE) restricting `roadmaps r` to rows matching `query`."""
+        tokens = _SEARCH_TOKEN_RE.findall(query or "")
+        if not tokens:
+            return "", []
+        if self.has_fts:
+            # Every word must match, as a prefix, in role, goal or roadmap text
+            match = " ".join(f'"{token}"*' for token in tokens)
+            return " JOIN roadmaps_fts f ON f.rowid = r.rowid WHERE roadmaps_fts MATCH ?", [match]
+        clauses, params = [], []
+        for token in tokens:
+            clauses.append("(r.role LIKE ? OR r.goal LIKE ? OR r.roadmap LIKE ?)")
+            params += [f"%{token}%"] * 3
+        return " WHERE " + " AND ".join(clauses), params
+
+    def list_roadmap_summaries(self, query: str = "", limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """
+        Return roadmaps matching `query`, without their resume and roadmap text, most recently accessed first.
+
+        `version` increases whenever the roadmap or its progress changes, so
+        it can key caches of derived data such as exports.
+
+        Args:
+            query (str): Words to search for in role, goal and roadmap text; empty matches all
+            limit (int): Page size, or None for all matches
+            offset (int): Number of matches to skip
+        """
+        self.flush()  # So versions reflect buffered progress changes
+        where, params = self._search_filter(query)
+        sql = f"SELECT {', '.join('r.' + c for c in SUMMARY_COLUMNS)} FROM roadmaps r{where} ORDER BY r.last_accessed DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit, offset]
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_row_to_roadmap(row, SUMMARY_COLUMNS) for row in rows]
+
+    def search_stats(self, query: str = "") -> Tuple[int, tuple]:
+        """
+        Count roadmaps matching `query`.
+
+        Returns:
+            tuple: (count, signature) where signature changes whenever any
+                matching record, its progress or the active roadmap changes
+        """
+        self.flush()
+        where, params = self._search_filter(query)
+        with self._connect() as conn:
+            count, total_version, last_accessed = conn.execute(
+                f"SELECT COUNT(*), TOTAL(r.version), MAX(r.last_accessed) FROM roadmaps r{where}", params).fetchone()
+            active = conn.execute("SELECT id FROM roadmaps WHERE active = 1 LIMIT 1").fetchone()
+        return count, (count, total_version, last_accessed, active[0] if active else None)
+
+    def export_roadmaps(self, roadmap_ids: List[str]) -> List[Dict]:
+        """Return full records, including progress, for `roadmap_ids` in the given order."""
+        self.flush()
+        exported = []
+        with self._connect() as conn:
+            for roadmap_id in roadmap_ids:
+                row = conn.execute(f"SELECT {', '.join(ROADMAP_COLUMNS)} FROM roadmaps WHERE id = ?", (roadmap_id,)).fetchone()
+                if row is None:
+                    continue
+                roadmap = _row_to_roadmap(row)
+                roadmap["progress"] = {task_key: bool(completed) for task_key, completed in conn.execute(
+                    "SELECT task_key, completed FROM progress WHERE roadmap_id = ?", (roadmap_id,))}
+                exported.append(roadmap)
+        return exported
+
+    def get_roadmap(self, roadmap_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(ROADMAP_COLUMNS)} FROM roadmaps WHERE id = ?", (roadmap_id,)).fetchone()
+        return _row_to_roadmap(row) if row else None
+
+    def get_active_roadmap(self) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(ROADMAP_COLUMNS)} FROM roadmaps WHERE active = 1 LIMIT 1").fetchone()
+        return _row_to_roadmap(row) if row else None
+
+    def ensure_active(self) -> Optional[Dict]:
+        """Return the active roadmap, activating the most recently created one if none is active."""
+        active = self.get_active_roadmap()
+        if active is not None:
+            return active
+        with self._connect() as conn:
+            row = conn.execute("SELECT id FROM roadmaps ORDER BY timestamp DESC LIMIT 1").fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE roadmaps SET active = 1 WHERE id = ?", (row[0],))
+        return self.get_roadmap(row[0])
+
+    def add_roadmap(self, roadmap: Dict, activate: bool = True) -> None:
+        """
+        Insert a new roadmap (or update the one with the same id), optionally making it the active one.
+
+        With activate=False an existing record keeps its active flag, so
+        regenerating the active roadmap in the background does not deactivate it.
+        """
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            if activate:
+                conn.execute("UPDATE roadmaps SET active = 0 WHERE active = 1")
+            # Upsert rather than REPLACE so existing progress rows are not cascaded away
+            conn.execute(
+                "INSERT INTO roadmaps (id, resume, goal, role, roadmap, timestamp, last_accessed, active)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET resume = excluded.resume, goal = excluded.goal, role = excluded.role,"
+                " roadmap = excluded.roadmap, last_accessed = excluded.last_accessed, active = MAX(roadmaps.active, excluded.active),"
+                " version = roadmaps.version + 1",
+                (roadmap["id"], roadmap["resume"], roadmap["goal"], roadmap["role"], roadmap["roadmap"],
+                 roadmap.get("timestamp", now), roadmap.get("last_accessed", now), int(activate)),
+            )
+
+    def set_active(self, roadmap_id: str) -> None:
+        """Make `roadmap_id` the only active roadmap and bump its last access time."""
+        with self._connect() as conn:
+            conn.execute("UPDATE roadmaps SET active = 0 WHERE active = 1 AND id != ?", (roadmap_id,))
+            cursor = conn.execute("UPDATE roadmaps SET active = 1, last_accessed = ? WHERE id = ?",
+                                  (datetime.now().isoformat(), roadmap_id))
+            if cursor.rowcount == 0:
+                raise RoadmapStoreError(f"Roadmap not found: {roadmap_id}")
+
+    def delete_roadmap(self, roadmap_id: str) -> None:
+        """Delete a roadmap and, through the foreign key, its progress rows."""
+        self._discard_pending(roadmap_id)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM roadmaps WHERE id = ?", (roadmap_id,))
+
+    # --- Progress ---
+
+    def get_progress(self, roadmap_id: str) -> Dict[str, bool]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT task_key, completed FROM progress WHERE roadmap_id = ?", (roadmap_id,)).fetchall()
+        progress = {task_key: bool(completed) for task_key, completed in rows}
+        with self._pending_lock:
+            progress.update({key: value for (rid, key), value in self._pending.items() if rid == roadmap_id})
+        return progress
+
+    def set_task_progress(self, roadmap_id: str, task_key: str, completed: bool) -> None:
+        """
+        Record a single task's completion state.
+
+        The change is buffered and written with any other pending changes
+        once `flush_delay` seconds pass; pass flush_delay=0 to write now.
+        """
+        with self._pending_lock:
+            self._pending[(roadmap_id, task_key)] = bool(completed)
+            if self.flush_delay <= 0:
+                schedule = False
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                schedule = True
+            else:
+                return  # A flush is already scheduled and will pick this change up
+        if schedule:
+            self._flush_timer.start()
+        else:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all buffered progress changes in one transaction.
+
+        Returns:
+            int: Number of task rows written
+        """
+        # Entries stay in the buffer, visible to get_progress, until the write commits;
+        # on error they are left there for the next flush to retry
+        with self._pending_lock:
+            pending = dict(self._pending)
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if not pending:
+            return 0
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            # Skip rows whose roadmap was deleted while the change was buffered
+            conn.executemany(
+                "INSERT INTO progress (roadmap_id, task_key, completed, updated_at)"
+                " SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM roadmaps WHERE id = ?)"
+                " ON CONFLICT(roadmap_id, task_key) DO UPDATE SET completed = excluded.completed, updated_at = excluded.updated_at",
+                [(roadmap_id, key, int(value), now, roadmap_id) for (roadmap_id, key), value in pending.items()],
+            )
+            self._bump_versions(conn, {roadmap_id for roadmap_id, _ in pending})
+        with self._pending_lock:
+            for key, value in pending.items():
+                if self._pending.get(key) == value:  # A newer toggle stays buffered
+                    del self._pending[key]
+        self._flush_count += 1
+        if self._flush_count % COMPACT_EVERY_FLUSHES == 0:
+            self.compact()
+        return len(pending)
+
+    def compact(self) -> None:
+        """Prune orphaned progress rows, checkpoint the WAL and refresh query planner stats."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM progress WHERE roadmap_id NOT IN (SELECT id FROM roadmaps)")
+        with self._connect() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+
+    def _discard_pending(self, roadmap_id: str) -> None:
+        with self._pending_lock:
+            for key in [key for key in self._pending if key[0] == roadmap_id]:
+                del self._pending[key]
+
+    def replace_progress(self, roadmap_id: str, progress: Dict[str, bool]) -> None:
+        """Make the stored progress for `roadmap_id` match `progress` exactly."""
+        self._discard_pending(roadmap_id)
+        with self._connect() as conn:
+            existing = dict(conn.execute("SELECT task_key, completed FROM progress WHERE roadmap_id = ?", (roadmap_id,)).fetchall())
+            stale = [key for key in existing if key not in progress]
+            conn.executemany("DELETE FROM progress WHERE roadmap_id = ? AND task_key = ?",
+                             [(roadmap_id, key) for key in stale])
+            changed = {key: value for key, value in progress.items() if existing.get(key) != int(bool(value))}
+            self._write_progress(conn, roadmap_id, changed)
+            if stale or changed:
+                self._bump_versions(conn, {roadmap_id})
+
+    @staticmethod
+    def _bump_versions(conn: sqlite3.Connection, roadmap_ids) -> None:
+        conn.executemany("UPDATE roadmaps SET version = version + 1 WHERE id = ?", [(rid,) for rid in roadmap_ids])
+
+    @staticmethod
+    def _write_progress(conn: sqlite3.Connection, roadmap_id: str, progress: Dict[str, bool]) -> None:
+        now = datetime.now().isoformat()
+        conn.executemany(
+            "INSERT INTO progress (roadmap_id, task_key, completed, updated_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(roadmap_id, task_key) DO UPDATE SET completed = excluded.completed, updated_at = excluded.updated_at",
+            [(roadmap_id, key, int(bool(value)), now) for key, value in progress.items()],
+        )
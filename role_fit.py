@@ -0,0 +1,80 @@
+# role_fit.py
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from skill_matcher import SkillMatcher, taxonomy_version
+
+class RoleFitMatrix:
+    """
+    Scores resumes against every role in the skills taxonomy at once.
+
+    The taxonomy's `required_skills` become a skill x role incidence matrix.
+    A resume is reduced to a skill-hit vector (one pass of the SkillMatcher),
+    and a single matrix product gives how many of each role's skills it
+    covers; a batch of resumes is scored the same way as a hit matrix.
+    """
+
+    def __init__(self, skills_data: Dict, matcher: Optional[SkillMatcher] = None):
+        self.version = taxonomy_version(skills_data)
+        self.matcher = matcher or SkillMatcher(skills_data)
+        required_skills = skills_data.get("required_skills", {})
+        self.roles = list(required_skills)
+        self.skills = list(dict.fromkeys(skill for skills in required_skills.values() for skill in skills))
+        self._skill_index = {skill: i for i, skill in enumerate(self.skills)}
+
+        self.incidence = np.zeros((len(self.skills), len(self.roles)), dtype=np.float32)
+        for j, role in enumerate(self.roles):
+            for skill in required_skills[role]:
+                self.incidence[self._skill_index[skill], j] = 1.0
+        self._role_sizes = np.maximum(self.incidence.sum(axis=0), 1.0)
+
+    def skill_vector(self, text: str) -> np.ndarray:
+        """1.0 for each taxonomy skill mentioned in `text`, else 0.0."""
+        vector = np.zeros(len(self.skills), dtype=np.float32)
+        for match in self.matcher.find(text):
+            index = self._skill_index.get(match.skill)
+            if index is not None:
+                vector[index] = 1.0
+        return vector
+
+    def skill_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """Stack the skill vectors of many texts into a (texts x skills) matrix."""
+        if not texts:
+            return np.zeros((0, len(self.skills)), dtype=np.float32)
+        return np.vstack([self.skill_vector(text) for text in texts])
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Fit of each text to each role.
+
+        Returns:
+            np.ndarray: (texts x roles) percentages of each role's skills covered
+        """
+        return self.skill_matrix(texts) @ self.incidence / self._role_sizes * 100.0
+
+    def score(self, text: str) -> np.ndarray:
+        """Fit of one text to each role, as percentages in `self.roles` order."""
+        return self.score_batch([text])[0]
+
+    def rank_roles(self, text: str, top: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Roles ordered by fit, best first.
+
+        Ties are broken by the number of matched skills, so a role covering
+        2 of 4 skills ranks above one covering 1 of 2.
+
+        Returns:
+            list: (role, percentage) pairs
+        """
+        hits = self.skill_vector(text) @ self.incidence
+        scores = hits / self._role_sizes * 100.0
+        order = np.lexsort((-hits, -scores))  # Last key is the primary sort key
+        ranked = [(self.roles[i], float(scores[i])) for i in order]
+        return ranked[:top] if top else ranked
+
+    def best_roles(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Best-fitting role and its score for each text in a batch."""
+        scores = self.score_batch(texts)
+        if not self.roles:
+            return [("", 0.0) for _ in texts]
+        best = scores.argmax(axis=1)
+        return [(self.roles[j], float(scores[i, j])) for i, j in enumerate(best)]
@@ -0,0 +1,120 @@
+# skill_matcher.py
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SKILLS_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_data.json")
+
+@dataclass(frozen=True)
+class SkillMatch:
+    skill: str               # Skill from the taxonomy, e.g. "Machine Learning"
+    alias: str               # Alias that matched, e.g. "ML"
+    start: int               # Offsets of the match in the searched text
+    end: int
+
+@dataclass(frozen=True)
+class SkillGapResult:
+    skills: Tuple[str, ...]                        # Skills checked, in taxonomy order
+    matched: Dict[str, Tuple[SkillMatch, ...]]     # Skill -> every place it was found
+    missing: Tuple[str, ...]
+    score: float                                   # Percentage of skills matched
+
+def load_skills_data(path: str = SKILLS_DATA_PATH) -> Dict:
+    """Read the skills taxonomy (required_skills, expanded_skill_terms, ...)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def taxonomy_version(skills_data: Dict) -> str:
+    """Content hash of a taxonomy; matchers are rebuilt only when it changes."""
+    return hashlib.sha256(json.dumps(skills_data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+class SkillMatcher:
+    """
+    Finds every taxonomy skill mentioned in a text in a single pass.
+
+    All aliases from `expanded_skill_terms` (and each skill's own name) are
+    compiled into one case-insensitive alternation, longest alias first, so
+    a resume is scanned once no matter how many skills or aliases exist.
+    Aliases must stand alone: "Py" does not match inside "Pydantic".
+    """
+
+    def __init__(self, skills_data: Dict):
+        self.version = taxonomy_version(skills_data)
+        self.required_skills = skills_data.get("required_skills", {})
+        self.default_skills = skills_data.get("default_skills", [])
+        self.course_recommendations = skills_data.get("course_recommendations", {})
+
+        expanded = skills_data.get("expanded_skill_terms", {})
+        all_skills = list(expanded)
+        for skill in [s for skills in self.required_skills.values() for s in skills] + list(self.default_skills):
+            if skill not in expanded and skill not in all_skills:
+                all_skills.append(skill)
+
+        # One alias can stand for several skills (e.g. "AI")
+        self._skills_by_alias = {}
+        for skill in all_skills:
+            for alias in expanded.get(skill, [skill]):
+                skills = self._skills_by_alias.setdefault(alias.lower(), [])
+                if skill not in skills:
+                    skills.append(skill)
+
+        aliases = sorted(self._skills_by_alias, key=len, reverse=True)
+        # Lookarounds rather than \b so aliases like "C++" and ".NET" work too
+        self._pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(re.escape(alias) for alias in aliases) + r")(?!\w)",
+            re.IGNORECASE,
+        ) if aliases else None
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """Return every skill mention in `text`, in order of appearance."""
+        if not text or self._pattern is None:
+            return []
+        matches = []
+        for found in self._pattern.finditer(text):
+            for skill in self._skills_by_alias[found.group(0).lower()]:
+                matches.append(SkillMatch(skill, found.group(0), found.start(), found.end()))
+        return matches
+
+    def skills_for_role(self, role: str) -> List[str]:
+        """Required skills for `role`, or the default skills for roles not in the taxonomy."""
+        return list(self.required_skills.get(role, self.default_skills))
+
+    def analyze(self, text: str, skills: Iterable[str]) -> SkillGapResult:
+        """
+        Compare `text` against a list of skills.
+
+        Args:
+            text (str): Resume (or any) text to search
+            skills (iterable): Skills to check, e.g. from skills_for_role
+
+        Returns:
+            SkillGapResult: Matched skills with offsets, missing skills and the match score
+        """
+        skills = tuple(dict.fromkeys(skills))
+        wanted = set(skills)
+        found = {}
+        for match in self.find(text):
+            if match.skill in wanted:
+                found.setdefault(match.skill, []).append(match)
+        matched = {skill: tuple(found[skill]) for skill in skills if skill in found}
+        missing = tuple(skill for skill in skills if skill not in found)
+        score = len(matched) / len(skills) * 100 if skills else 0.0
+        return SkillGapResult(skills, matched, missing, score)
+
+    def course_for(self, skill: str) -> Optional[str]:
+        return self.course_recommendations.get(skill)
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+def get_skill_matcher() -> SkillMatcher:
+    """Return a matcher over the bundled skills_data.json, built on first use."""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = SkillMatcher(load_skills_data())
+        return _matcher